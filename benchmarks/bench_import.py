@@ -0,0 +1,54 @@
+"""
+marimo_lib の import 時間を計測する（モジュールごとに新しいプロセスで計測）。
+
+    uv run python benchmarks/bench_import.py
+    uv run python benchmarks/bench_import.py --repeat 10 marimo_lib.util.image
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+TARGETS = [
+    "marimo_lib",
+    "marimo_lib.util",
+    "marimo_lib.util.image",
+    "marimo_lib.util.plot",
+    "marimo_lib.util.schedule",
+    "marimo_lib.util.excalidraw",
+]
+
+_SNIPPET = """
+import time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+
+def measure(module: str, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _SNIPPET.format(module=module)],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=TARGETS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        times = measure(module, args.repeat)
+        print(f"{module:30s} median {statistics.median(times) * 1e3:8.1f} ms  min {min(times) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+add_schedule の描画時間を engine="px" と engine="bar" で比較する。
+
+    uv run python benchmarks/bench_schedule.py --tasks 10000
+"""
+import argparse
+import time
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from datagen import make_schedule
+from marimo_lib.util import schedule
+
+
+def run(data: pd.DataFrame, engine: str, repeat: int) -> float:
+    timeline_info = dict(x_start="start", x_end="end", y="resource", color="resource", text="name")
+    best = float("inf")
+
+    for _ in range(repeat):
+        fig = go.Figure()
+        t = time.perf_counter()
+        schedule.add_schedule(fig=fig, data=data, timeline_info=timeline_info, engine=engine, irow=None, icol=None)
+        best = min(best, time.perf_counter() - t)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_schedule(args.tasks)
+
+    t_px = run(data, "px", args.repeat)
+    t_bar = run(data, "bar", args.repeat)
+
+    print(f"tasks={args.tasks}")
+    print(f"  px : {t_px * 1e3:8.1f} ms")
+    print(f"  bar: {t_bar * 1e3:8.1f} ms  (x{t_px / t_bar:.1f})")
+
+
+if __name__ == "__main__":
+    main()
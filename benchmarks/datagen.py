@@ -0,0 +1,92 @@
+"""
+ベンチマーク用の合成データ生成。すべて seed 固定で再現可能。
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def make_events(n: int, seed: int = 0) -> list:
+    """get_np_histogram2d 用の 2 変数イベント [x, y]（相関のある 2 次元ガウス）。"""
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0.0, 1.0, n)
+    y = 0.5 * x + rng.normal(0.0, 1.0, n)
+    return [x, y]
+
+
+def make_gridded_map(nx: int, ny: int, seed: int = 0) -> list:
+    """get_np_histogram2d 用の格子データ [x, y, z]（nx × ny の中心座標と重み）。"""
+    rng = np.random.default_rng(seed)
+    xc = np.linspace(-5.0, 5.0, nx)
+    yc = np.linspace(-5.0, 5.0, ny)
+    x, y = np.meshgrid(xc, yc, indexing="ij")
+    z = np.exp(-(x**2 + y**2) / 4.0) + 0.01 * rng.random((nx, ny))
+    return [x.ravel(), y.ravel(), z.ravel()]
+
+
+def make_schedule(n_tasks: int, n_resources: int = 20, seed: int = 0) -> pd.DataFrame:
+    """add_schedule 用のタスク表（task, start, end, resource, name）。"""
+    rng = np.random.default_rng(seed)
+    t0 = np.datetime64("2025-01-01T00:00")
+    start = t0 + rng.integers(0, 365 * 24 * 60, n_tasks).astype("timedelta64[m]")
+    end = start + rng.integers(30, 3 * 24 * 60, n_tasks).astype("timedelta64[m]")
+    resource = np.array([f"Resource{i}" for i in range(n_resources)])[rng.integers(0, n_resources, n_tasks)]
+
+    return pd.DataFrame({
+        "task": [f"Task{i}" for i in range(n_tasks)],
+        "start": pd.to_datetime(start).strftime("%Y-%m-%d %H:%M"),
+        "end": pd.to_datetime(end).strftime("%Y-%m-%d %H:%M"),
+        "resource": resource,
+        "name": [f"Name{i}" for i in range(n_tasks)],
+    })
+
+
+def write_schedule_csv(path: Path, n_rows: int, seed: int = 0) -> Path:
+    """
+    add_task_csv 用の CSV（notebook/data/schedule.csv と同じ列構成）を書き出す。
+    1 割を add_periodic_task（週 1 回 × 4 週）、残りを add_task の行にする。
+    """
+    df = make_schedule(n_rows, seed=seed)
+    periodic = np.random.default_rng(seed).random(n_rows) < 0.1
+
+    df.insert(0, "func", np.where(periodic, "add_periodic_task", "add_task"))
+    until = pd.to_datetime(df["start"]) + pd.Timedelta(days=27)
+    df["repeat_until"] = np.where(periodic, until.dt.strftime("%Y-%m-%d %H:%M"), "")
+    df["every"] = np.where(periodic, "7", "")
+    df["unit"] = np.where(periodic, "D", "")
+    df["seq_col"] = np.where(periodic, "Seq", "")
+    df["priority"] = np.where(periodic, "", "1")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+    return path
+
+
+def make_figure(n_traces: int, n_points: int, seed: int = 0) -> go.Figure:
+    """save_fig_as_html 用の図（float64 の Scatter を n_traces 本）。"""
+    rng = np.random.default_rng(seed)
+    fig = go.Figure()
+    x = np.arange(n_points, dtype=float)
+    for i in range(n_traces):
+        fig.add_trace(go.Scatter(x=x, y=rng.normal(i, 1.0, n_points), name=f"trace{i}"))
+    fig.update_layout(title="bench")
+    return fig
+
+
+def write_image(path: Path, width: int, height: int, seed: int = 0) -> Path:
+    """get_image_html 用のノイズ入り PNG（圧縮が効きにくく、ファイルが大きくなる）。"""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    gx = np.linspace(0, 255, width, dtype=np.float32)[None, :]
+    gy = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack(np.broadcast_arrays(gx, gy, (gx + gy) / 2), axis=-1)
+    pixels = np.clip(base + rng.normal(0, 24, base.shape), 0, 255).astype(np.uint8)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(pixels, "RGB").save(path)
+    return path
@@ -0,0 +1,325 @@
+"""
+marimo_lib.util のホットパスをまとめて計測し、保存済みのベースラインと比較する。
+
+各ケースについて、repeat 回のうち最速の実行時間、スループット（要素数 / 秒）、
+tracemalloc で測ったピーク割り当て量を表示する。ピークメモリは時間計測とは別の
+1 回の実行で測る（tracemalloc が処理を遅くするため）。
+
+    uv run python benchmarks/run.py                       # small サイズ、ベースラインがあれば比較
+    uv run python benchmarks/run.py --size medium -k histogram
+    uv run python benchmarks/run.py --save-baseline       # 結果を benchmarks/baseline.json に保存
+    uv run python benchmarks/run.py --baseline other.json --tolerance 0.1
+
+ベースラインより時間またはピークメモリが (1 + tolerance) 倍を超えたケースは
+REGRESSION と表示し、終了コード 1 を返す。ベースラインはマシン依存なので、
+比較は同じマシンで保存したものに対して行うこと。
+"""
+import argparse
+import fnmatch
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import bench_import
+import datagen
+from marimo_lib.util import histogram, image, plot, schedule
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+SIZES = ("small", "medium", "large")
+
+# setup(n, workdir) -> (計測対象の 0 引数関数, 処理する要素数)
+Setup = Callable[[int, Path], Tuple[Callable[[], Any], int]]
+
+CASES: Dict[str, Tuple[Dict[str, int], Setup, str, bool]] = {}
+
+
+def case(name: str, unit: str, *, small: int, medium: int, large: int, subprocess: bool = False):
+    """
+    ベンチマークケースを登録するデコレータ。サイズごとの要素数を指定する。
+    subprocess=True のケースは、計測対象の関数が子プロセス内で計った秒数を返す
+    （ピークメモリは測らない）。
+    """
+
+    def deco(setup: Setup) -> Setup:
+        CASES[name] = ({"small": small, "medium": medium, "large": large}, setup, unit, subprocess)
+        return setup
+
+    return deco
+
+
+# ---- plot -------------------------------------------------------------------
+
+@case("html_roundtrip", "points", small=4_000, medium=40_000, large=400_000)
+def _html_roundtrip(n: int, workdir: Path):
+    n_traces = 4
+    fig = datagen.make_figure(n_traces, n // n_traces)
+    path = str(workdir / "roundtrip.html")
+
+    def fn():
+        plot.save_fig_as_html(go.Figure(fig), path)
+        data, layout = plot.get_plotly_values_json(plot.load_html_as_str(path))
+        # decode_typed_arrays は tuple の中までは辿らないので、data と layout を別々に渡す
+        return plot.decode_typed_arrays(data), plot.decode_typed_arrays(layout)
+
+    return fn, n
+
+
+@case("html_incremental", "points", small=400_000, medium=4_000_000, large=40_000_000)
+def _html_incremental(n: int, workdir: Path):
+    # 20 本のうち 1 本だけ変えて保存し直す（定期保存されるダッシュボードの想定）
+    n_traces = 20
+    fig = datagen.make_figure(n_traces, n // n_traces)
+    writer = plot.IncrementalHTMLWriter(str(workdir / "incremental.html"))
+    writer.save(fig)
+    rng = np.random.default_rng(1)
+
+    def fn():
+        fig.data[0].y = rng.normal(0.0, 1.0, n // n_traces)
+        return writer.save(fig)
+
+    return fn, n
+
+
+@case("bundle_load_one", "figures", small=50, medium=200, large=1_000)
+def _bundle_load_one(n: int, workdir: Path):
+    # n 図のバンドルから 1 図だけを読む。時間はバンドルの大きさによらないはず
+    figs = [datagen.make_figure(2, 2_000, seed=i) for i in range(n)]
+    path = plot.save_figs_as_bundle(figs, str(workdir / f"bundle_{n}.html"))
+    return lambda: plot.decode_typed_arrays(plot.load_bundle_figure(path, n // 2)), n
+
+
+@case("histogram2d", "events", small=1_000_000, medium=10_000_000, large=100_000_000)
+def _histogram2d(n: int, workdir: Path):
+    data = datagen.make_events(n)
+    return lambda: plot.get_np_histogram2d(data, [200, 200], [-5, 5], [-5, 5]), n
+
+
+@case("histogram2d_memmap", "events", small=1_000_000, medium=10_000_000, large=100_000_000)
+def _histogram2d_memmap(n: int, workdir: Path):
+    path = workdir / f"events_{n}.npy"
+    np.save(path, np.column_stack(datagen.make_events(n)))
+    cols = histogram.load_columns(path)
+    return lambda: plot.get_np_histogram2d(cols, [200, 200], [-5, 5], [-5, 5]), n
+
+
+@case("histogram2d_gridded", "cells", small=250_000, medium=4_000_000, large=16_000_000)
+def _histogram2d_gridded(n: int, workdir: Path):
+    side = int(round(n ** 0.5))
+    data = datagen.make_gridded_map(side, side)
+    return lambda: plot.get_np_histogram2d(data), side * side
+
+
+@case("slice_array", "events", small=1_000_000, medium=10_000_000, large=100_000_000)
+def _slice_array(n: int, workdir: Path):
+    data = datagen.make_events(n)
+    return lambda: plot.get_slice_array(data, [200, 200], [-5, 5], [-5, 5], slice_axis="x", bin_span=5), n
+
+
+# ---- schedule ---------------------------------------------------------------
+
+@case("periodic_task", "rows", small=1_000, medium=10_000, large=100_000)
+def _periodic_task(n: int, workdir: Path):
+    start = pd.Timestamp("2025-01-01 09:00")
+    until = (start + pd.Timedelta(hours=n - 1)).strftime("%Y-%m-%d %H:%M")
+
+    def fn():
+        df = schedule.init_schedule()
+        schedule.add_periodic_task(
+            df,
+            task="bench",
+            start="2025-01-01 09:00",
+            end="2025-01-01 09:30",
+            resource="Resource0",
+            name="bench",
+            repeat_until=until,
+            every=1,
+            unit="h",
+        )
+        return df
+
+    return fn, n
+
+
+@case("task_csv", "rows", small=1_000, medium=10_000, large=100_000)
+def _task_csv(n: int, workdir: Path):
+    path = str(datagen.write_schedule_csv(workdir / f"schedule_{n}.csv", n))
+
+    def fn():
+        df = schedule.init_schedule()
+        schedule.add_task_csv(df, path)
+        return df
+
+    return fn, n
+
+
+@case("add_schedule", "tasks", small=1_000, medium=10_000, large=100_000)
+def _add_schedule(n: int, workdir: Path):
+    data = datagen.make_schedule(n)
+    timeline_info = dict(x_start="start", x_end="end", y="resource", color="resource", text="name")
+
+    def fn():
+        fig = go.Figure()
+        schedule.add_schedule(fig=fig, data=data, timeline_info=timeline_info, irow=None, icol=None)
+        return fig
+
+    return fn, n
+
+
+# ---- image ------------------------------------------------------------------
+
+@case("image_html", "pixels", small=1_000_000, medium=9_000_000, large=36_000_000)
+def _image_html(n: int, workdir: Path):
+    side = int(round(n ** 0.5))
+    path = str(datagen.write_image(workdir / f"image_{side}.png", side, side))
+
+    def fn():
+        image.clear_image_cache()  # キャッシュなしの 1 回目を測る
+        return image.get_image_html(path, width=800)
+
+    return fn, side * side
+
+
+@case("image_html_cached", "pixels", small=1_000_000, medium=9_000_000, large=36_000_000)
+def _image_html_cached(n: int, workdir: Path):
+    side = int(round(n ** 0.5))
+    path = str(datagen.write_image(workdir / f"image_{side}.png", side, side))
+    image.get_image_html(path, width=800)
+    return lambda: image.get_image_html(path, width=800), side * side
+
+
+# ---- import -----------------------------------------------------------------
+
+@case("import_util", "imports", small=1, medium=1, large=1, subprocess=True)
+def _import_util(n: int, workdir: Path):
+    return lambda: bench_import.measure("marimo_lib.util", 1)[0], n
+
+
+# ---- runner -----------------------------------------------------------------
+
+def measure(fn: Callable[[], Any], repeat: int, subprocess: bool = False) -> Dict[str, Optional[float]]:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn()
+        elapsed = out if subprocess else time.perf_counter() - t
+        best = min(best, elapsed)
+        del out
+
+    peak = None
+    if not subprocess:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {"time_s": best, "peak_bytes": peak}
+
+
+def _fmt_bytes(n: Optional[float]) -> str:
+    return "-" if n is None else f"{n / 2**20:9.1f} MB"
+
+
+def _compare(result: Dict[str, Any], base: Optional[Dict[str, Any]], tolerance: float) -> Tuple[str, bool]:
+    if base is None:
+        return "(no baseline)", False
+
+    notes = []
+    regressed = False
+    for key, label in (("time_s", "time"), ("peak_bytes", "mem")):
+        new, old = result.get(key), base.get(key)
+        if not new or not old:
+            continue
+        ratio = new / old
+        notes.append(f"{label} x{ratio:.2f}")
+        if ratio > 1 + tolerance:
+            regressed = True
+
+    if regressed:
+        notes.append("REGRESSION")
+    return "  ".join(notes), regressed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", dest="pattern", default="*", help="ケース名の glob パターン（例: 'histogram*'）")
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", nargs="?", type=Path, const=DEFAULT_BASELINE, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--list", action="store_true", help="ケース一覧を表示して終了")
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if fnmatch.fnmatch(name, args.pattern)]
+    if args.list:
+        for name in names:
+            sizes, _, unit, _ = CASES[name]
+            print(f"{name:22s} {unit:8s} " + "  ".join(f"{s}={sizes[s]:,}" for s in SIZES))
+        return 0
+
+    baseline: Dict[str, Any] = {}
+    if args.save_baseline is None and args.baseline.is_file():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")).get("results", {})
+
+    results: Dict[str, Dict[str, Any]] = {}
+    regressions = []
+
+    with tempfile.TemporaryDirectory(prefix="molib-bench-") as tmp:
+        for name in names:
+            sizes, setup, unit, subprocess = CASES[name]
+            key = f"{name}[{args.size}]"
+
+            fn, n_items = setup(sizes[args.size], Path(tmp))
+            result = measure(fn, args.repeat, subprocess)
+            result["items"] = n_items
+            result["throughput"] = n_items / result["time_s"]
+            results[key] = result
+
+            note, regressed = _compare(result, baseline.get(key), args.tolerance)
+            if regressed:
+                regressions.append(key)
+
+            print(
+                f"{key:30s} {result['time_s'] * 1e3:10.1f} ms "
+                f"{result['throughput']:12.3g} {unit}/s "
+                f"{_fmt_bytes(result['peak_bytes'])}   {note}",
+                flush=True,
+            )
+
+    if args.save_baseline is not None:
+        saved: Dict[str, Any] = {}
+        if args.save_baseline.is_file():
+            saved = json.loads(args.save_baseline.read_text(encoding="utf-8")).get("results", {})
+        saved.update(results)
+
+        args.save_baseline.write_text(json.dumps({
+            "meta": {
+                "python": sys.version.split()[0],
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+            },
+            "results": saved,
+        }, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"baseline saved: {args.save_baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -119,8 +119,8 @@ def _(GLOBAL_FIG_WIDTH: int, mo):
 
 @app.cell
 def _(GLOBAL_FIG_WIDTH: int, mo, x_2d, y_2d):
-    _data_x = molib.plot.get_slice_array([x_2d, y_2d], [200, 200], slice_axis='x', bin_span=50)
-    _data_y = molib.plot.get_slice_array([x_2d, y_2d], [200, 200], slice_axis='y', bin_span=50)
+    _data_x = molib.plot.get_slice_array([x_2d, y_2d], [200, 200], slice_axis='x', bin_span=50, cache=True)
+    _data_y = molib.plot.get_slice_array([x_2d, y_2d], [200, 200], slice_axis='y', bin_span=50, cache=True)
 
     _fig = make_subplots(
         rows=1, cols=2, vertical_spacing=0.15, horizontal_spacing=0.15,
@@ -156,6 +156,7 @@ def _(GLOBAL_FIG_WIDTH: int, mo, x_2d, y_2d):
             `plot.get_slice_array`にて実行可能。
             - `slice_axis`, `bin_span`でスライス方向とRebinの数を調整できる。
             - `histo_skip`で`numpy.histogram2d(...)`をスキップするかを選択可能。
+            - `cache=True`で2Dヒストグラムをキャッシュし、`bin_span`などを変えた再実行では再計算しない。
             """
         ),
         _fig.update_layout(height=500, width=GLOBAL_FIG_WIDTH, showlegend=True, title_text="Slice data")
@@ -314,11 +315,8 @@ def _(GLOBAL_FIG_WIDTH: int, mo, schedule, values):
         text="name",
     )
 
-    fill_palette = molib.schedule.get_color_list('tab10',0.3)
-    edge_palette = molib.schedule.get_color_list('tab10',0.9)
-
-    fill_map = dict(zip(values, fill_palette))
-    edge_map = dict(zip(values, edge_palette))
+    fill_map = molib.schedule.get_color_map(values, 'tab10', 0.3)
+    edge_map = molib.schedule.get_color_map(values, 'tab10', 0.9)
     line_map = dict(color=molib.schedule.get_color_list('tokyo',0.8)[0], width=2, dash="dot")
     taskname_map = dict(size=14, color="#000000")
     _fig = make_subplots(rows=1, cols=1, vertical_spacing=0.15, horizontal_spacing=0.15, subplot_titles=([""]))
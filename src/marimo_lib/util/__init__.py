@@ -1,11 +1,33 @@
-from . import image 
-from . import plot
-from . import schedule
-from . import excalidraw
+import importlib
+from typing import TYPE_CHECKING
+
+# サブモジュールは最初に属性アクセスされたときに import する (PEP 562)。
+# plotly / pandas / PIL / anywidget / marimo などの重い依存は使う分だけ読み込まれる。
+if TYPE_CHECKING:
+    from . import image
+    from . import plot
+    from . import schedule
+    from . import excalidraw
+    from . import profiling
+    from . import histogram
 
 __all__ = [
     "image",
     "plot",
     "schedule",
-    "excalidraw"
-]
\ No newline at end of file
+    "excalidraw",
+    "profiling",
+    "histogram",
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,114 @@
+"""
+Apache Arrow / Parquet 入力の共通処理（pyarrow は任意依存。使うときだけ import する）。
+
+- 必要な列だけを読む（列指定で Parquet の列チャンクごと読み飛ばす）
+- filters は行グループの統計情報で絞り込まれる（pyarrow.dataset の述語プッシュダウン）
+- 数値列は可能ならコピーなしで NumPy 配列にする
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset  # noqa: F401
+    except ImportError as e:
+        raise ImportError("pyarrow is required to read Arrow / Parquet data (uv add pyarrow)") from e
+    return pyarrow
+
+
+def is_arrow_source(obj: Any) -> bool:
+    """pyarrow の Table / RecordBatch / Dataset、または Parquet ファイル・ディレクトリのパスか。"""
+    if type(obj).__module__.startswith("pyarrow"):
+        return True
+    if isinstance(obj, (str, os.PathLike)):
+        path = Path(obj)
+        return path.suffix in PARQUET_SUFFIXES or (path.is_dir() and any(path.glob("*.parquet")))
+    return False
+
+
+def dataset(source: Any):
+    """source を pyarrow.dataset.Dataset にする。"""
+    pa = require_pyarrow()
+    import pyarrow.dataset as ds
+
+    if isinstance(source, ds.Dataset):
+        return source
+    if isinstance(source, pa.RecordBatch):
+        source = pa.Table.from_batches([source])
+    if isinstance(source, pa.Table):
+        return ds.dataset(source)
+    return ds.dataset(source, format="parquet")
+
+
+def expression(filters: Any):
+    """
+    filters を pyarrow.compute.Expression にする。
+    Expression ならそのまま、[("run", "==", 3), ("energy", ">", 0.5)] のような
+    pandas.read_parquet 形式のリスト（DNF）なら変換する。
+    """
+    if filters is None:
+        return None
+
+    require_pyarrow()
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    if isinstance(filters, pc.Expression):
+        return filters
+    return pq.filters_to_expression(filters)
+
+
+def to_numpy(arr: Any) -> np.ndarray:
+    """Array / ChunkedArray を NumPy にする。チャンクが 1 つで null がなければコピーしない。"""
+    pa = require_pyarrow()
+
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.chunk(0) if arr.num_chunks == 1 else arr.combine_chunks()
+
+    try:
+        return arr.to_numpy(zero_copy_only=True)
+    except pa.ArrowInvalid:
+        return arr.to_numpy(zero_copy_only=False)
+
+
+def read_columns(source: Any, columns: Sequence[str], filters: Any = None) -> List[np.ndarray]:
+    """columns の列だけを読んで NumPy 配列のリストで返す。"""
+    pa = require_pyarrow()
+
+    if isinstance(source, pa.RecordBatch):
+        source = pa.Table.from_batches([source])
+
+    if isinstance(source, pa.Table):
+        # メモリ上の Table は select / filter の方がバッファを共有できる
+        if filters is not None:
+            source = source.filter(expression(filters))
+        table = source.select(list(columns))
+    else:
+        table = dataset(source).to_table(columns=list(columns), filter=expression(filters))
+
+    return [to_numpy(table.column(name)) for name in columns]
+
+
+def iter_batches(
+    source: Any,
+    columns: Sequence[str],
+    filters: Any = None,
+    batch_size: Optional[int] = None,
+) -> Iterator[List[np.ndarray]]:
+    """columns の列を RecordBatch 単位で読み、NumPy 配列のリストとして順に返す。"""
+    kwargs = {} if batch_size is None else {"batch_size": batch_size}
+    for batch in dataset(source).to_batches(columns=list(columns), filter=expression(filters), **kwargs):
+        yield [to_numpy(batch.column(i)) for i in range(len(columns))]
+
+
+def column_names(source: Any) -> List[str]:
+    return list(dataset(source).schema.names)
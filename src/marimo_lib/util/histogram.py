@@ -0,0 +1,706 @@
+"""
+2 次元ヒストグラムのキャッシュと、ヒストグラムを加工する Histogram2D。
+
+marimo のスライダーなどでセルが再実行されるたびに同じ生データを np.histogram2d し直さないよう、
+(データの指紋, bins, xrange, yrange) をキーに結果をモジュール内に保持する。
+モジュールはセルの再実行では読み直されないので、キャッシュは再実行をまたいで有効。
+
+- データの指紋は全要素のバイト列のハッシュ（blake2b）。np.histogram2d の数分の 1 の時間で済み、
+  1 要素でも違えば別のキーになる。
+- 同じデータ・同じ範囲で、bins が整数倍の細かいヒストグラムがキャッシュにあれば、
+  生データには触れずにビンを足し合わせて粗いヒストグラムを作る。
+- 合計バイト数に上限があり、超えたら古いものから捨てる。
+
+キャッシュ内の配列は書き込み禁止にしてあり、呼び出し側にはコピーを返す。
+
+Histogram2D は (counts, xedges, yedges) のタプルとしてそのまま使え、rebin / crop / project /
+profile をすべて counts とエッジの NumPy 演算だけで行う（生データには触れない）。
+
+例:
+    h = Histogram2D.from_data([x, y], [400, 400], [-5, 5], [-5, 5])
+    h.rebin(4, 2).crop(xrange=[-2, 2]).project("x")
+    h.profile("x")                   # x ビンごとの y の平均と RMS
+
+メモリに載らないデータは load_columns で np.memmap の列として開き、
+histogram2d_chunked / histogram1d_chunked で chunk_size 行ずつ積算する（メモリ使用量は一定）。
+get_np_histogram2d は np.memmap の列や .npy のパスを渡されると自動的にこちらを使う。
+
+    cols = load_columns("run01_events.npy")              # (N, k) または (k, N) の .npy
+    counts, xedges, yedges = histogram2d_chunked(cols[:2], [400, 400], [-5, 5], [-5, 5])
+
+Parquet / Arrow（要 pyarrow）は histogram2d_arrow で必要な列だけをバッチごとに読む。
+
+    h = histogram2d_arrow("data/run01.parquet", ["x", "y"], [400, 400], [-5, 5], [-5, 5], filters=[("run", "==", 12)])
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .profiling import profiled
+
+Hist2D = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+_HIST_CACHE_MAX_ITEMS = 64
+_HIST_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# 分割処理の 1 回あたりの行数。np.histogram2d 内部のコピーを含めて数十 MB に収まる
+_CHUNK_ROWS = 1 << 20
+
+
+def data_fingerprint(data: Sequence[Any]) -> str:
+    """
+    列のリスト [x, y(, w)] から指紋（16 進文字列）を作る。
+
+    各列の dtype・形と全要素のバイト列をハッシュする。
+    内容が同じなら別オブジェクト（marimo の再実行で作り直された配列など）でも同じ指紋になる。
+    """
+    h = hashlib.blake2b(digest_size=16)
+
+    for col in data:
+        lazy = _is_lazy_column(col)
+        a = col if lazy else np.asarray(col)
+        h.update(f"{np.dtype(a.dtype).str}|{a.shape}|".encode("ascii"))
+
+        # np.memmap や h5py.Dataset のような遅延読み込みの列は _CHUNK_ROWS 行ずつ読む
+        if lazy:
+            parts = (np.asarray(a[i:i + _CHUNK_ROWS]) for i in range(0, len(a), _CHUNK_ROWS))
+        else:
+            parts = (a,)
+
+        for part in parts:
+            if part.dtype == object:
+                h.update(repr(part.tolist()).encode("utf-8"))
+            else:
+                h.update(np.ascontiguousarray(part).reshape(-1).view(np.uint8))
+
+    return h.hexdigest()
+
+
+def _bins_key(bins: Any) -> Any:
+    """bins を比較可能なキーにする。整数 2 つなら (nx, ny)、エッジ配列ならその内容のハッシュ。"""
+    if bins is None:
+        return None
+
+    if np.ndim(bins) == 0:
+        return (int(bins), int(bins))
+
+    if len(bins) == 2 and all(np.ndim(b) == 0 for b in bins):
+        return (int(bins[0]), int(bins[1]))
+
+    h = hashlib.blake2b(digest_size=16)
+    for b in bins:
+        h.update(np.ascontiguousarray(b, dtype=float).tobytes() + b"|")
+    return ("edges", h.hexdigest())
+
+
+def _range_key(r: Optional[Sequence[float]]) -> Tuple[float, ...]:
+    return tuple(float(v) for v in r[:2]) if r is not None and len(r) >= 2 else ()
+
+
+def _readonly(hist: Hist2D) -> "Histogram2D":
+    for a in hist:
+        a.flags.writeable = False
+    return Histogram2D(*hist)
+
+
+def _copy(hist: Hist2D) -> "Histogram2D":
+    return Histogram2D(*(a.copy() for a in hist))
+
+
+def _sum_bins(counts: np.ndarray, fx: int, fy: int) -> np.ndarray:
+    """(nx, ny) の counts を fx × fy ビンずつ足し合わせる（nx, ny はそれぞれ fx, fy の倍数）。"""
+    nx, ny = counts.shape
+    return counts.reshape(nx // fx, fx, ny // fy, fy).sum(axis=(1, 3))
+
+
+def _is_lazy_column(col: Any) -> bool:
+    """np.memmap や、len() とスライスで部分的に読める ndarray 以外の列（h5py.Dataset など）。"""
+    if isinstance(col, np.memmap):
+        return True
+    if isinstance(col, (np.ndarray, list, tuple)) or hasattr(col, "__array_ufunc__"):
+        return False
+    return hasattr(col, "shape") and hasattr(col, "dtype") and hasattr(col, "__getitem__")
+
+
+def is_out_of_core(data: Sequence[Any]) -> bool:
+    """data の列に np.memmap などの遅延読み込みの列が含まれるか。"""
+    return any(_is_lazy_column(col) for col in data)
+
+
+def load_columns(
+    source: Union[str, Path],
+    columns: Optional[Sequence[Union[int, str]]] = None,
+    *,
+    dtype: Any = None,
+    offset: int = 0,
+) -> List[np.ndarray]:
+    """
+    ファイルをメモリに読み込まずに、列ごとの np.memmap のリストとして開く。
+
+    - .npy の構造化配列: フィールドが列（columns はフィールド名）
+    - .npy の 2 次元配列: 行数の少ない方の軸を列とみなす（(N, k) でも (k, N) でもよい）
+    - .npy の 1 次元配列: 1 列
+    - それ以外（生のバイナリダンプ）: dtype（構造化 dtype 推奨）と offset（ヘッダのバイト数）を指定する
+
+    例:
+        x, y = load_columns("run01.npy", [0, 1])
+        x, y = load_columns("run01.bin", ["x", "y"], dtype=[("x", "<f4"), ("y", "<f4"), ("t", "<u8")], offset=64)
+    """
+    path = Path(source)
+
+    if path.suffix == ".npy":
+        arr = np.load(path, mmap_mode="r")
+    elif dtype is not None:
+        arr = np.memmap(path, dtype=dtype, mode="r", offset=offset)
+    else:
+        raise ValueError(f"dtype is required for raw binary files: {path}")
+
+    if arr.dtype.names:
+        names = arr.dtype.names if columns is None else columns
+        return [arr[name] for name in names]
+
+    if arr.ndim == 1:
+        cols = [arr]
+    elif arr.ndim == 2:
+        cols = list(arr.T) if arr.shape[0] >= arr.shape[1] else list(arr)
+    else:
+        raise ValueError(f"expected a 1D or 2D array, got shape {arr.shape}")
+
+    return cols if columns is None else [cols[i] for i in columns]
+
+
+def _finite_rows(chunk: List[np.ndarray]) -> List[np.ndarray]:
+    """各列を float64 にし、どれかの列が有限でない行を落とす。"""
+    chunk = [np.asarray(c, dtype=float) for c in chunk]
+    mask = np.isfinite(chunk[0])
+    for c in chunk[1:]:
+        mask &= np.isfinite(c)
+    return chunk if mask.all() else [c[mask] for c in chunk]
+
+
+def _iter_chunks(cols: Sequence[Any], chunk_size: int) -> Iterator[List[np.ndarray]]:
+    """列を chunk_size 行ずつ float64 の ndarray にして返す。有限でない値を含む行は落とす。"""
+    n = min(len(c) for c in cols)
+    for i in range(0, n, chunk_size):
+        yield _finite_rows([c[i:i + chunk_size] for c in cols])
+
+
+def _iter_arrow_chunks(source: Any, columns: Sequence[str], filters: Any, chunk_size: int) -> Iterator[List[np.ndarray]]:
+    from . import _arrow
+
+    for batch in _arrow.iter_batches(source, columns, filters, batch_size=chunk_size):
+        yield _finite_rows(batch)
+
+
+# read([i, ...]) -> 列 i, ... の chunk を順に返すイテレータ
+ChunkReader = Callable[[Sequence[int]], Iterator[List[np.ndarray]]]
+
+
+def _chunked_range(chunks: Iterator[List[np.ndarray]]) -> Tuple[float, float]:
+    """1 列分の chunk から (min, max) を求める。np.histogram と同じく min == max なら ±0.5 広げる。"""
+    lo, hi = np.inf, -np.inf
+    for (c,) in chunks:
+        if c.size:
+            lo = min(lo, c.min())
+            hi = max(hi, c.max())
+
+    if lo > hi:
+        lo, hi = 0.0, 1.0
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return float(lo), float(hi)
+
+
+def _has_range(r: Optional[Sequence[float]]) -> bool:
+    return r is not None and len(r) >= 2
+
+
+def _is_bin_count(b: Any) -> bool:
+    return isinstance(b, (int, np.integer))
+
+
+def _axis_bins(bins: Any) -> List[Any]:
+    """
+    np.histogram2d の bins を軸ごとの [bx, by] にする（各要素はビン数かエッジの 1 次元配列）。
+    エッジ配列の長さが軸で違ってもよい。np.ndim に不揃いなリストを渡さないよう、要素ごとに調べる。
+    """
+    if _is_bin_count(bins):
+        return [bins, bins]
+
+    if len(bins) == 2 and all(_is_bin_count(b) or np.ndim(b) == 1 for b in bins):
+        return list(bins)
+
+    if all(np.ndim(b) == 0 for b in bins):
+        # 1 本のエッジ配列を両軸に使う
+        return [bins, bins]
+
+    raise ValueError(f"bins must be an int, [bins_x, bins_y] or an array of edges, got {bins!r}")
+
+
+def _histogram2d_chunks(read: ChunkReader, bins: Any, xrange: Any, yrange: Any) -> "Histogram2D":
+    bins = _axis_bins(10 if bins is None else bins)
+
+    # get_np_histogram2d と同じく、xrange と yrange の両方があるときだけ範囲を使い、
+    # どちらかが無ければビン数で指定した軸はデータの min/max から決める
+    given = [xrange, yrange] if _has_range(xrange) and _has_range(yrange) else [None, None]
+    hist_range = []
+    for axis, (b, r) in enumerate(zip(bins, given)):
+        if not _is_bin_count(b):
+            hist_range.append(None)  # エッジ配列の軸は範囲を使わない
+        elif r is not None:
+            hist_range.append([float(v) for v in r[:2]])
+        else:
+            hist_range.append(_chunked_range(read([axis])))
+
+    counts, xedges, yedges = np.histogram2d([], [], bins=bins, range=hist_range)
+    for cx, cy in read([0, 1]):
+        counts += np.histogram2d(cx, cy, bins=bins, range=hist_range)[0]
+
+    return Histogram2D(counts, xedges, yedges)
+
+
+def _histogram1d_chunks(read: ChunkReader, bins: Any, xrange: Any) -> Tuple[np.ndarray, np.ndarray]:
+    hist_range = None
+    if np.ndim(bins) == 0:
+        hist_range = list(xrange[:2]) if _has_range(xrange) else _chunked_range(read([0]))
+
+    counts, edges = np.histogram([], bins=bins, range=hist_range)
+    for (c,) in read([0]):
+        counts += np.histogram(c, bins=bins, range=hist_range)[0]
+
+    return counts, edges
+
+
+@profiled
+def histogram2d_chunked(
+    data: Sequence[Any],
+    bins: Any = None,
+    xrange: Optional[Sequence[float]] = None,
+    yrange: Optional[Sequence[float]] = None,
+    chunk_size: Optional[int] = None,
+) -> "Histogram2D":
+    """
+    [x, y] を chunk_size 行ずつ np.histogram2d して足し合わせる。戻り値は get_np_histogram2d と同じ並び。
+
+    列は np.memmap や h5py.Dataset など、len() とスライスができれば何でもよい。
+    メモリ使用量は chunk_size 行分で一定。範囲は get_np_histogram2d と同じく xrange と yrange の
+    両方を指定したときだけ使い、そうでなければ最初に min/max を求めるため 1 回余分に読む。
+    """
+    chunk_size = chunk_size or _CHUNK_ROWS
+    return _histogram2d_chunks(
+        lambda idx: _iter_chunks([data[i] for i in idx], chunk_size), bins, xrange, yrange
+    )
+
+
+@profiled
+def histogram1d_chunked(
+    col: Any,
+    bins: Any = 10,
+    xrange: Optional[Sequence[float]] = None,
+    chunk_size: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """1 列を chunk_size 行ずつ np.histogram して足し合わせ、(counts, edges) を返す。"""
+    chunk_size = chunk_size or _CHUNK_ROWS
+    return _histogram1d_chunks(lambda idx: _iter_chunks([col], chunk_size), bins, xrange)
+
+
+def histogram1d_edges(
+    col: Any,
+    bins: int = 10,
+    xrange: Optional[Sequence[float]] = None,
+    chunk_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    go_Histogram が使うビンのエッジを返す。メモリ上の列でも np.memmap でも同じ規則で決める。
+
+    - xrange=None: データの min/max を bins 等分（np.histogram と同じ）
+    - xrange=[start, end, size]: start から size 刻みで end に届くまで（plotly の xbins と同じ。
+      最後のビンは end を越えることがある）
+    """
+    if xrange is None:
+        chunk_size = chunk_size or _CHUNK_ROWS
+        lo, hi = _chunked_range(_iter_chunks([col], chunk_size))
+        return np.linspace(lo, hi, int(bins) + 1)
+
+    start, end, size = (float(v) for v in xrange[:3])
+    if size <= 0:
+        raise ValueError(f"bin size must be positive, got {size}")
+    n = max(1, int(np.ceil((end - start) / size - 1e-9)))
+    return start + size * np.arange(n + 1)
+
+
+@profiled
+def histogram2d_arrow(
+    source: Any,
+    columns: Sequence[str],
+    bins: Any = None,
+    xrange: Optional[Sequence[float]] = None,
+    yrange: Optional[Sequence[float]] = None,
+    filters: Any = None,
+    chunk_size: Optional[int] = None,
+) -> "Histogram2D":
+    """
+    Arrow / Parquet の 2 列 columns=[x, y] を RecordBatch ごとに読みながら 2D ヒストグラムを作る（要 pyarrow）。
+
+    source は Parquet ファイル・ディレクトリのパス、pyarrow の Table / RecordBatch / Dataset。
+    columns の列しか読まず、filters（pyarrow.compute.Expression または
+    [("run", "==", 3)] 形式のリスト）は行グループの統計で絞り込まれる。
+    メモリ使用量は 1 バッチ分で一定。
+
+    例:
+        h = histogram2d_arrow("data/runs/", ["x", "y"], [400, 400], [-5, 5], [-5, 5],
+                              filters=[("run", "==", 12)])
+    """
+    if len(columns) != 2:
+        raise ValueError(f"columns must name the x and y columns, got {columns!r}")
+
+    chunk_size = chunk_size or _CHUNK_ROWS
+    return _histogram2d_chunks(
+        lambda idx: _iter_arrow_chunks(source, [columns[i] for i in idx], filters, chunk_size), bins, xrange, yrange
+    )
+
+
+@profiled
+def read_arrow_columns(source: Any, columns: Optional[Sequence[str]] = None, filters: Any = None) -> List[np.ndarray]:
+    """
+    Arrow / Parquet から columns の列だけを NumPy 配列のリストとして読む（要 pyarrow）。
+    null のない数値列はコピーせずに変換する。columns を省略するとすべての列。
+    """
+    from . import _arrow
+
+    if columns is None:
+        columns = _arrow.column_names(source)
+    return _arrow.read_columns(source, columns, filters)
+
+
+def is_arrow_source(data: Any) -> bool:
+    """data が pyarrow の Table / RecordBatch / Dataset、または Parquet のパスか（pyarrow は import しない）。"""
+    from . import _arrow
+
+    return _arrow.is_arrow_source(data)
+
+
+def resolve_columns(data: Any, columns: Optional[Sequence[Union[int, str]]] = None, filters: Any = None) -> List[Any]:
+    """
+    get_np_histogram2d などに渡された data を列のリストにそろえる。
+
+    - Arrow / Parquet → read_arrow_columns(data, columns, filters)。columns は [x, y] か [x, y, z] で必須
+    - .npy / 生バイナリのパス → load_columns(data, columns)
+    - 列のリスト → .npy のパスの列だけ np.memmap で開く。それ以外はそのまま
+    """
+    if is_arrow_source(data):
+        # 列を省略して全列を読むと、列数によっては格子データとして巨大な配列を作ってしまう
+        if columns is None or len(columns) not in (2, 3):
+            raise ValueError(f"columns must name 2 or 3 columns for Arrow / Parquet data, got {columns!r}")
+        return read_arrow_columns(data, columns, filters)
+
+    if isinstance(data, (str, os.PathLike)):
+        return load_columns(data, columns)
+
+    return [load_columns(c)[0] if isinstance(c, (str, os.PathLike)) else c for c in data]
+
+
+class _HistogramCache:
+    """(指紋, 範囲, bins) -> (counts, xedges, yedges) の LRU。合計バイト数で上限を持つ。"""
+
+    def __init__(self, max_items: int, max_bytes: int) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.derived = 0
+        self.misses = 0
+        self._items: OrderedDict[tuple, Tuple[Hist2D, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Hist2D]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def find_finer(self, base: tuple, nx: int, ny: int) -> Optional[Tuple[Hist2D, int, int]]:
+        """
+        base（指紋と範囲）が同じで、bins が (nx, ny) の整数倍のものを探す。
+        足し合わせる量が最も少ない（いちばん粗い）ものを (hist, fx, fy) で返す。
+        """
+        best = None
+        with self._lock:
+            for (b, bins), (hist, _) in self._items.items():
+                if b != base or bins is None or bins[0] == "edges":
+                    continue
+                fx, rx = divmod(bins[0], nx)
+                fy, ry = divmod(bins[1], ny)
+                if rx or ry or fx < 1 or fy < 1:
+                    continue
+                if best is None or fx * fy < best[1] * best[2]:
+                    best = (hist, fx, fy)
+        return best
+
+    def put(self, key: tuple, hist: Hist2D) -> None:
+        nbytes = sum(a.nbytes for a in hist)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+
+            if nbytes > self.max_bytes:
+                return
+
+            self._items[key] = (hist, nbytes)
+            self.nbytes += nbytes
+
+            while len(self._items) > self.max_items or self.nbytes > self.max_bytes:
+                _, (_, n) = self._items.popitem(last=False)
+                self.nbytes -= n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+            self.hits = self.derived = self.misses = 0
+
+
+_hist_cache = _HistogramCache(_HIST_CACHE_MAX_ITEMS, _HIST_CACHE_MAX_BYTES)
+
+
+def clear_histogram_cache() -> None:
+    """ヒストグラムのキャッシュを空にする。"""
+    _hist_cache.clear()
+
+
+def set_histogram_cache_limit(
+    max_items: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> None:
+    """ヒストグラムキャッシュの上限（件数・バイト数）を変更する。次の追加時から反映。"""
+    if max_items is not None:
+        _hist_cache.max_items = max_items
+    if max_bytes is not None:
+        _hist_cache.max_bytes = max_bytes
+
+
+def histogram_cache_info() -> dict:
+    """キャッシュの状態（件数、バイト数、ヒット/導出/ミス回数）を返す。"""
+    return {
+        "items": len(_hist_cache._items),
+        "nbytes": _hist_cache.nbytes,
+        "max_items": _hist_cache.max_items,
+        "max_bytes": _hist_cache.max_bytes,
+        "hits": _hist_cache.hits,
+        "derived": _hist_cache.derived,
+        "misses": _hist_cache.misses,
+    }
+
+
+@profiled
+def cached_histogram2d(
+    data: list = None,
+    bins: list = None,
+    xrange: list = None,
+    yrange: list = None,
+    chunk_size: Optional[int] = None,
+) -> Optional["Histogram2D"]:
+    """
+    plot.get_np_histogram2d と同じ引数・戻り値で、結果をキャッシュする版。
+
+    1. 同じ (データ, bins, 範囲) があればそれを返す
+    2. bins が整数倍の細かいヒストグラムがあれば、ビンを足し合わせて作る
+    3. どちらもなければ get_np_histogram2d で計算する
+
+    戻り値は Histogram2D（(counts, xedges, yedges) のタプルとしても使える）。
+    配列はキャッシュのコピーなので、書き換えてもキャッシュには影響しない。
+
+    例:
+        # bin_span を変えながら何度呼んでも np.histogram2d は 1 回だけ
+        counts, xedges, yedges = cached_histogram2d([x, y], [400, 400], [-5, 5], [-5, 5])
+        counts, xedges, yedges = cached_histogram2d([x, y], [100, 200], [-5, 5], [-5, 5])  # 足し合わせで導出
+    """
+    if data is None:
+        return None
+
+    base = (data_fingerprint(data), _range_key(xrange), _range_key(yrange))
+    bins_key = _bins_key(bins)
+    key = (base, bins_key)
+
+    hist = _hist_cache.get(key)
+    if hist is not None:
+        _hist_cache.hits += 1
+        return _copy(hist)
+
+    # 重み付き（3 列）はビンが入力の格子で決まるので、足し合わせによる導出はしない
+    if len(data) == 2 and bins_key is not None and bins_key[0] != "edges":
+        finer = _hist_cache.find_finer(base, *bins_key)
+        if finer is not None:
+            fine, fx, fy = finer
+            hist = _readonly(fine.rebin(fx, fy))
+            _hist_cache.put(key, hist)
+            _hist_cache.derived += 1
+            return _copy(hist)
+
+    from .plot import get_np_histogram2d
+
+    hist = _readonly(get_np_histogram2d(data, bins, xrange, yrange, chunk_size=chunk_size))
+    _hist_cache.put(key, hist)
+    _hist_cache.misses += 1
+    return _copy(hist)
+
+
+def _axis_slice(edges: np.ndarray, r: Optional[Sequence[float]]) -> slice:
+    """範囲 [min, max] と重なるビンの slice を返す。ビン境界で外側に丸める。"""
+    if r is None or len(r) < 2:
+        return slice(0, len(edges) - 1)
+
+    n = len(edges) - 1
+    i0 = int(np.clip(np.searchsorted(edges, r[0], side="right") - 1, 0, n))
+    i1 = int(np.clip(np.searchsorted(edges, r[1], side="left"), i0, n))
+    return slice(i0, i1)
+
+
+class Histogram2D(NamedTuple):
+    """
+    counts: shape=(nx, ny), xedges: (nx+1,), yedges: (ny+1,) の 2 次元ヒストグラム。
+
+    np.histogram2d / get_np_histogram2d の戻り値と同じ並びのタプルなので、
+    slice_1d_from_2dhist(*h, ...) や get_slice_array(h, histo_skip=True) にそのまま渡せる。
+    各メソッドは新しい Histogram2D や dict を返し、元の配列は変更しない。
+    """
+
+    counts: np.ndarray
+    xedges: np.ndarray
+    yedges: np.ndarray
+
+    @classmethod
+    def from_data(
+        cls,
+        data: list,
+        bins: list = None,
+        xrange: list = None,
+        yrange: list = None,
+        cache: bool = True,
+        chunk_size: Optional[int] = None,
+    ) -> "Histogram2D":
+        """生データから作る。引数は get_np_histogram2d と同じ。"""
+        if cache:
+            return cached_histogram2d(data, bins, xrange, yrange, chunk_size=chunk_size)
+
+        from .plot import get_np_histogram2d
+
+        return cls(*get_np_histogram2d(data, bins, xrange, yrange, chunk_size=chunk_size))
+
+    @property
+    def xcenters(self) -> np.ndarray:
+        return 0.5 * (self.xedges[:-1] + self.xedges[1:])
+
+    @property
+    def ycenters(self) -> np.ndarray:
+        return 0.5 * (self.yedges[:-1] + self.yedges[1:])
+
+    @property
+    def entries(self) -> float:
+        return float(self.counts.sum())
+
+    def rebin(self, fx: int = 1, fy: int = 1) -> "Histogram2D":
+        """
+        x を fx ビン、y を fy ビンずつまとめる。ビン数はそれぞれ fx, fy で割り切れる必要がある。
+        """
+        nx, ny = self.counts.shape
+        if fx < 1 or fy < 1:
+            raise ValueError(f"rebin factors must be >= 1, got fx={fx}, fy={fy}")
+        if nx % fx or ny % fy:
+            raise ValueError(f"rebin factors must divide the bin numbers: ({nx}, {ny}) by ({fx}, {fy})")
+
+        return Histogram2D(_sum_bins(self.counts, fx, fy), self.xedges[::fx].copy(), self.yedges[::fy].copy())
+
+    def crop(self, xrange: Optional[Sequence[float]] = None, yrange: Optional[Sequence[float]] = None) -> "Histogram2D":
+        """
+        [min, max] と重なるビンだけを残す（ビン境界で外側に丸める）。None の軸はそのまま。
+        """
+        sx = _axis_slice(self.xedges, xrange)
+        sy = _axis_slice(self.yedges, yrange)
+
+        return Histogram2D(
+            self.counts[sx, sy].copy(),
+            self.xedges[sx.start:sx.stop + 1].copy(),
+            self.yedges[sy.start:sy.stop + 1].copy(),
+        )
+
+    def project(self, axis: str = "x", range: Optional[Sequence[float]] = None) -> Dict[str, np.ndarray]:
+        """
+        axis 方向の 1D ヒストグラムに射影する。
+        range を指定すると、もう一方の軸をその範囲（ビン単位）に絞ってから足し合わせる。
+
+        Returns
+        -------
+        dict
+            {"counts", "edges", "centers", "widths"}（slice_1d_from_2dhist と同じキー）
+        """
+        if axis == "x":
+            sy = _axis_slice(self.yedges, range)
+            counts = self.counts[:, sy].sum(axis=1)
+            edges = self.xedges
+        elif axis == "y":
+            sx = _axis_slice(self.xedges, range)
+            counts = self.counts[sx, :].sum(axis=0)
+            edges = self.yedges
+        else:
+            raise ValueError("axis must be 'x' or 'y'")
+
+        return {
+            "counts": counts.astype(float),
+            "edges": edges,
+            "centers": 0.5 * (edges[:-1] + edges[1:]),
+            "widths": np.diff(edges),
+        }
+
+    def profile(self, axis: str = "x", range: Optional[Sequence[float]] = None) -> Dict[str, np.ndarray]:
+        """
+        axis のビンごとに、もう一方の変数の平均と RMS（標準偏差）をビン中心で近似して求める
+        （ROOT の TProfile 相当）。エントリーのないビンは nan。
+        range を指定すると、もう一方の軸をその範囲（ビン単位）に絞る。
+
+        Returns
+        -------
+        dict
+            {"centers", "edges", "mean", "rms", "entries"}
+        """
+        if axis == "x":
+            s = _axis_slice(self.yedges, range)
+            w = self.counts[:, s]
+            values = self.ycenters[s]
+            edges = self.xedges
+        elif axis == "y":
+            s = _axis_slice(self.xedges, range)
+            w = self.counts[s, :].T
+            values = self.xcenters[s]
+            edges = self.yedges
+        else:
+            raise ValueError("axis must be 'x' or 'y'")
+
+        entries = w.sum(axis=1).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (w @ values) / entries
+            var = (w @ values**2) / entries - mean**2
+
+        return {
+            "centers": 0.5 * (edges[:-1] + edges[1:]),
+            "edges": edges,
+            "mean": mean,
+            "rms": np.sqrt(np.maximum(var, 0.0)),
+            "entries": entries,
+        }
+
+    def slice(self, bin_index: int, *, slice_axis: str = "x", bin_span: int = 1, normalize: bool = False) -> Dict[str, Any]:
+        """slice_1d_from_2dhist(*self, ...) と同じ。"""
+        from .plot import slice_1d_from_2dhist
+
+        return slice_1d_from_2dhist(*self, bin_index, slice_axis=slice_axis, bin_span=bin_span, normalize=normalize)
@@ -1,13 +1,514 @@
 from __future__ import annotations
+import asyncio
+import contextvars
+from collections import OrderedDict
 from pathlib import Path
 import base64
-from PIL import Image
+import contextlib
+import hashlib
 import html
-from typing import Literal, Optional, Union
-import marimo as mo
+import itertools
+import io
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from typing import IO, Any, Dict, List, Literal, Optional, Sequence, Tuple, Union
+
+from .profiling import profiled, record_io
 
 SizeLike = Union[int, float, str]
 
+FileKey = Tuple[str, int, int]
+
+# data URL 用 base64 キャッシュの既定上限（件数とバイト数の両方で LRU 退避）
+_ENCODE_CACHE_MAX_ITEMS = 256
+_ENCODE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# ファイル読み込み・エンコードの単位（3 の倍数にして base64 のパディングを出さない）
+_ENCODE_CHUNK = 3 * 1024 * 1024
+
+# 変換結果（縮小画像・動画・poster）を置くディスクキャッシュの合計サイズの上限
+_DISK_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class _EncodeCache:
+    """(path, mtime, size) -> 値 の LRU。合計バイト数が上限を超えたら古いものから捨てる。"""
+
+    def __init__(self, max_items: int, max_bytes: int) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items: OrderedDict[FileKey, Tuple[object, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: FileKey):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key: FileKey, value: object, nbytes: int) -> None:
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+
+            if nbytes > self.max_bytes:
+                return
+
+            self._items[key] = (value, nbytes)
+            self.nbytes += nbytes
+
+            while len(self._items) > self.max_items or self.nbytes > self.max_bytes:
+                _, (_, n) = self._items.popitem(last=False)
+                self.nbytes -= n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+
+_b64_cache = _EncodeCache(_ENCODE_CACHE_MAX_ITEMS, _ENCODE_CACHE_MAX_BYTES)
+_size_cache = _EncodeCache(4096, 4096 * 64)
+
+
+def clear_image_cache() -> None:
+    """画像のサイズ・base64 エンコード結果のキャッシュを空にする。"""
+    _b64_cache.clear()
+    _size_cache.clear()
+
+
+def set_image_cache_limit(
+    max_items: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    disk_max_bytes: Optional[int] = None,
+) -> None:
+    """
+    base64 キャッシュの上限（件数・バイト数）と、ディスクキャッシュの合計バイト数の上限を変更する。
+    次の追加時から反映。
+    """
+    global _DISK_CACHE_MAX_BYTES
+
+    if max_items is not None:
+        _b64_cache.max_items = max_items
+    if max_bytes is not None:
+        _b64_cache.max_bytes = max_bytes
+    if disk_max_bytes is not None:
+        _DISK_CACHE_MAX_BYTES = disk_max_bytes
+
+
+def _file_key(path: Path) -> FileKey:
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _encode_file_b64(path: Path) -> str:
+    """ファイルを少しずつ読みながら base64 文字列にする。"""
+    parts = []
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_ENCODE_CHUNK)
+            if not chunk:
+                break
+            record_io(read=len(chunk))
+            parts.append(base64.b64encode(chunk).decode("ascii"))
+    return "".join(parts)
+
+
+def _cached_b64(path: Path, key: FileKey) -> str:
+    b64 = _b64_cache.get(key)
+    if b64 is None:
+        if _cache_only.get():
+            raise _CacheMiss(path)
+        b64 = _encode_file_b64(path)
+        _b64_cache.put(key, b64, len(b64))
+    _log_cache("b64", key, b64)
+    return b64
+
+
+# EXIF の Orientation のうち、縦横が入れ替わるもの
+_EXIF_ROTATED = {5, 6, 7, 8}
+
+# JPEG の SOFn マーカー（DHT=C4, JPG=C8, DAC=CC を除く）
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _exif_orientation(app1: bytes) -> int:
+    """APP1 セグメントの中身から EXIF の Orientation (0x0112) を読む。無ければ 1。"""
+    if app1[:6] != b"Exif\x00\x00":
+        return 1
+
+    tiff = app1[6:]
+    order = "little" if tiff[:2] == b"II" else "big"
+    ifd = int.from_bytes(tiff[4:8], order)
+    n = int.from_bytes(tiff[ifd:ifd + 2], order)
+
+    for i in range(n):
+        entry = tiff[ifd + 2 + 12 * i:ifd + 14 + 12 * i]
+        if len(entry) < 12:
+            break
+        if int.from_bytes(entry[0:2], order) == 0x0112:
+            return int.from_bytes(entry[8:10], order)
+    return 1
+
+
+def _probe_jpeg(f: IO[bytes]) -> Optional[Tuple[int, int]]:
+    """
+    マーカーを順にたどって SOFn セグメントの高さ・幅を読む。
+    EXIF で 90° 回転が指定されていれば、表示される向きの (幅, 高さ) にする。
+    """
+    f.seek(2)
+    orientation = 1
+    while True:
+        b = f.read(1)
+        while b and b != b"\xff":
+            b = f.read(1)
+        while b == b"\xff":
+            b = f.read(1)
+        if not b:
+            return None
+
+        marker = b[0]
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            continue  # 長さを持たないマーカー
+        if marker == 0xD9:
+            return None
+
+        seg = f.read(2)
+        if len(seg) < 2:
+            return None
+        length = int.from_bytes(seg, "big")
+
+        if marker in _JPEG_SOF:
+            sof = f.read(5)
+            if len(sof) < 5:
+                return None
+            width, height = int.from_bytes(sof[3:5], "big"), int.from_bytes(sof[1:3], "big")
+            return (height, width) if orientation in _EXIF_ROTATED else (width, height)
+
+        if marker == 0xE1:
+            orientation = _exif_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def _probe_header(path: Path) -> Optional[Tuple[int, int]]:
+    """
+    PNG / GIF / WebP / JPEG のヘッダだけを読んで (幅, 高さ) を返す。
+    対応していない形式・壊れたファイルは None。
+    """
+    with open(path, "rb") as f:
+        head = f.read(32)
+
+        if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+            return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return int.from_bytes(head[6:8], "little"), int.from_bytes(head[8:10], "little")
+
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+                return (
+                    int.from_bytes(head[26:28], "little") & 0x3FFF,
+                    int.from_bytes(head[28:30], "little") & 0x3FFF,
+                )
+            if chunk == b"VP8L" and head[20:21] == b"\x2f":
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+            return None
+
+        if head[:2] == b"\xff\xd8":
+            return _probe_jpeg(f)
+
+    return None
+
+
+@profiled
+def probe_image_size(input_path: Union[str, Path]) -> Tuple[int, int]:
+    """
+    画像の (幅, 高さ) を返す。
+
+    PNG / GIF / WebP / JPEG はファイル先頭のヘッダだけを読んで求め、
+    それ以外は PIL にフォールバックする。結果は (path, mtime, size) でキャッシュするので、
+    同じファイルを何度調べてもファイルを開くのは最初の 1 回だけ。
+    """
+    path = Path(input_path)
+    return _cached_image_size(path, _file_key(path))
+
+
+def _cached_image_size(path: Path, key: FileKey) -> Tuple[int, int]:
+    size = _size_cache.get(key)
+    if size is None:
+        if _cache_only.get():
+            raise _CacheMiss(path)
+        size = _probe_header(path)
+        if size is None:
+            from PIL import Image
+
+            # Image.open はヘッダだけ読んで画素はデコードしない
+            with Image.open(path) as img:
+                size = img.size
+                if img.getexif().get(0x0112, 1) in _EXIF_ROTATED:
+                    size = size[::-1]
+        _size_cache.put(key, size, 64)
+    _log_cache("size", key, size)
+    return size
+
+
+_IMAGE_MIME = {
+    ".png": "image/png",
+    ".apng": "image/apng",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".avif": "image/avif",
+    ".bmp": "image/bmp",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+    ".svg": "image/svg+xml",
+}
+
+# optimize=True で使える再圧縮形式: (PIL の format 名, MIME, 拡張子)
+_OPTIMIZE_FORMATS = {
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    "png": ("PNG", "image/png", ".png"),
+}
+
+
+def _image_mime(path: Path) -> str:
+    return _IMAGE_MIME.get(path.suffix.lower(), "image/png")
+
+
+def _cache_dir(cache_dir: Optional[Union[str, Path]] = None) -> Path:
+    """
+    変換結果を置くディスクキャッシュのディレクトリ。
+    未指定なら $MARIMO_LIB_CACHE_DIR、それも無ければ ~/.cache/marimo_lib。
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get("MARIMO_LIB_CACHE_DIR") or Path.home() / ".cache" / "marimo_lib"
+    return Path(cache_dir)
+
+
+def _prune_disk_cache(root: Path, keep: Path) -> None:
+    """
+    root 以下のキャッシュファイルの合計が _DISK_CACHE_MAX_BYTES を超えたら、
+    最終使用（atime）の古いものから消す。keep（今作ったファイル）は消さない。
+    """
+    files = []
+    total = 0
+    for f in root.glob("*/*"):
+        if f.name.endswith((".tmp", ".tmp.mp4", ".tmp.jpg")):
+            continue
+        try:
+            st = f.stat()
+        except OSError:
+            continue
+        files.append((st.st_atime, st.st_size, f))
+        total += st.st_size
+
+    files.sort()
+    for _, size, f in files:
+        if total <= _DISK_CACHE_MAX_BYTES:
+            break
+        if f == keep:
+            continue
+        f.unlink(missing_ok=True)
+        total -= size
+
+
+def _touch(path: Path) -> None:
+    """
+    キャッシュのヒットを atime に記録する（_prune_disk_cache は atime の古い順に消す）。
+    mtime は base64 キャッシュのキーに含まれるので変えない。
+    """
+    try:
+        os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+    except OSError:
+        pass
+
+
+def clear_disk_cache(cache_dir: Optional[Union[str, Path]] = None) -> None:
+    """縮小画像・変換した動画・poster のディスクキャッシュを消す。"""
+    root = _cache_dir(cache_dir)
+    for sub in ("images", "videos", "posters"):
+        shutil.rmtree(root / sub, ignore_errors=True)
+
+
+def _optimized_image(
+    path: Path,
+    key: FileKey,
+    size: Tuple[int, int],
+    image_format: str,
+    quality: int,
+    cache_dir: Optional[Union[str, Path]],
+) -> Tuple[Path, str]:
+    """
+    画像を size に縮小して image_format で再圧縮したファイルを作り、(パス, MIME) を返す。
+    元ファイルの (path, mtime, size) と変換条件から名前を決めるので、同じ条件なら再利用する。
+    EXIF の回転は画素に反映してから縮小する（再圧縮で EXIF は落ちるため）。
+    キャッシュの合計が上限を超えたら古いものから消す（clear_disk_cache で全部消せる）。
+    """
+    pil_format, mime, ext = _OPTIMIZE_FORMATS[image_format]
+
+    # "exif" は EXIF の回転を反映する前に作られた（向きが誤った）キャッシュを使わないための印
+    digest = hashlib.sha1(repr((key, size, image_format, quality, "exif")).encode("utf-8")).hexdigest()
+    out = _cache_dir(cache_dir) / "images" / f"{digest}{ext}"
+
+    if out.is_file():
+        _touch(out)
+        return out, mime
+
+    if _cache_only.get():
+        raise _CacheMiss(path)
+
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as img:
+        rotated = img.getexif().get(0x0112, 1) in _EXIF_ROTATED
+        # JPEG は縮小しながらデコードできる。draft は回転前の向きなので、回転するときは長辺でそろえる
+        img.draft("RGB", (max(size),) * 2 if rotated else size)
+
+        if getattr(img, "n_frames", 1) > 1:
+            # アニメーションは縮小すると 1 コマ目だけになるので元のまま使う
+            return path, _image_mime(path)
+
+        img = ImageOps.exif_transpose(img)
+        if (img.width > img.height) != (size[0] > size[1]) and img.width != img.height:
+            size = size[::-1]  # size が回転前の向きで求められていた場合（EXIF 付きの PNG など）
+
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha and pil_format != "JPEG" else "RGB")
+
+        if img.size != size:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(f"{out.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+        if pil_format == "PNG":
+            img.save(tmp, format=pil_format, optimize=True)
+        elif pil_format == "WEBP":
+            img.save(tmp, format=pil_format, quality=quality, method=4)
+        else:
+            img.save(tmp, format=pil_format, quality=quality, optimize=True, progressive=True)
+
+        os.replace(tmp, out)
+        record_io(written=out.stat().st_size)
+
+    _prune_disk_cache(_cache_dir(cache_dir), out)
+    return out, mime
+
+
+_ASSET_LOADER_JS = """
+(function () {
+  if (window.molibAssetURL) return;
+  var urls = {};
+  window.molibAssetURL = function (key) {
+    if (urls[key]) return urls[key];
+    var el = document.getElementById("molib-asset-" + key);
+    if (!el) return null;
+    var bin = atob(el.textContent.trim());
+    var buf = new Uint8Array(bin.length);
+    for (var i = 0; i < bin.length; i++) buf[i] = bin.charCodeAt(i);
+    urls[key] = URL.createObjectURL(new Blob([buf], {type: el.dataset.mime}));
+    return urls[key];
+  };
+  var pending = false;
+  function hydrate() {
+    pending = false;
+    document.querySelectorAll("[data-molib-asset]").forEach(function (el) {
+      var url = window.molibAssetURL(el.dataset.molibAsset);
+      if (url && el.getAttribute("src") !== url) el.setAttribute("src", url);
+    });
+  }
+  hydrate();
+  new MutationObserver(function () {
+    if (!pending) { pending = true; requestAnimationFrame(hydrate); }
+  }).observe(document.documentElement, {childList: true, subtree: true});
+})();
+"""
+
+
+class AssetStore:
+    """
+    data URL で埋め込むアセットを内容のハッシュで一元管理する置き場。
+
+    同じ内容は何回登録しても 1 回分しか持たず、html() で
+    <script type="application/octet-stream"> の定義として 1 度だけ出力する。
+    各所の <img> などは data-molib-asset="ハッシュ" で参照し、
+    ページ上のローダーが blob URL に差し替える。
+    エクスポートした HTML の大きさは使用回数ではなく、異なる内容の量で決まる。
+
+    例:
+        store = AssetStore()
+        logo = get_image_html("figs/logo.png", store=store)   # 何枚のスライドで使っても 1 回分
+        ...
+        mo.Html(store.html())   # どこか 1 つのセルで表示しておく
+    """
+
+    def __init__(self) -> None:
+        self._assets: OrderedDict[str, Tuple[str, str]] = OrderedDict()
+        self._file_keys: Dict[Tuple[FileKey, str], str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._assets
+
+    def add_b64(self, b64: str, mime: str) -> str:
+        """base64 文字列を登録してキー（内容ハッシュ）を返す。"""
+        key = hashlib.sha256(b64.encode("ascii")).hexdigest()[:32]
+        with self._lock:
+            self._assets.setdefault(key, (mime, b64))
+        return key
+
+    def add_bytes(self, data: bytes, mime: str) -> str:
+        """バイト列を登録してキー（内容ハッシュ）を返す。"""
+        return self.add_b64(base64.b64encode(data).decode("ascii"), mime)
+
+    def add_file(self, input_path: Union[str, Path], mime: Optional[str] = None) -> str:
+        """ファイルを登録してキーを返す。同じ (path, mtime, size) ならハッシュし直さない。"""
+        path = Path(input_path)
+        file_key = _file_key(path)
+        mime = mime or _IMAGE_MIME.get(path.suffix.lower()) or _VIDEO_MIME.get(path.suffix.lower(), "application/octet-stream")
+
+        key = self._file_keys.get((file_key, mime))
+        if key is None or key not in self._assets:
+            key = self.add_b64(_cached_b64(path, file_key), mime)
+            self._file_keys[(file_key, mime)] = key
+        return key
+
+    def html(self) -> str:
+        """登録済みアセットの定義とローダーをまとめた HTML を返す。"""
+        with self._lock:
+            items = list(self._assets.items())
+
+        parts = [
+            f'<script type="application/octet-stream" id="molib-asset-{key}" data-mime="{mime}">{b64}</script>'
+            for key, (mime, b64) in items
+        ]
+        parts.append(f"<script>{_ASSET_LOADER_JS}</script>")
+        return "\n".join(parts)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._assets.clear()
+            self._file_keys.clear()
+
+
 def _parse_px(v: Optional[SizeLike]) -> Optional[float]:
     """int/float -> px とみなす。'123px' -> 123。'40%' 等は None."""
     if v is None:
@@ -29,6 +530,7 @@ def _to_css_size(v: SizeLike) -> str:
         return f"{v}px"
     return str(v)
 
+@profiled
 def get_image_html(
     input_path: str = "images.png",
     alt_name: str = "サンプル画像",
@@ -38,21 +540,35 @@ def get_image_html(
     height: Optional[SizeLike] = None,
     rounded: bool = False,
     round_radius: str = "10%",
+    optimize: bool = False,
+    image_format: Literal["webp", "jpeg", "png"] = "webp",
+    quality: int = 85,
+    dpr: float = 2.0,
+    cache_dir: Optional[Union[str, Path]] = None,
+    store: Optional[AssetStore] = None,
 ) -> str:
     """
-    mode="data_url"  : <img src="data:image/png;base64,..."> を返す（従来どおり）
+    mode="data_url"  : <img src="data:image/...;base64,..."> を返す（MIME は拡張子から判定）
     mode="file_src"  : <img src="notebook/image/mini001.png" ...> を返す（mo.image 風）
     - width & height 両方指定: そのまま使う（縦横比は無視）
     - 片方だけ指定: もう片方は元画像の縦横比から自動計算（px指定のときのみ）
     - 未指定: 元サイズ
+
+    optimize=True (data_url のみ):
+        表示サイズ × dpr まで縮小し（拡大はしない）、image_format / quality で
+        再圧縮したものを埋め込む。変換結果は cache_dir（既定 ~/.cache/marimo_lib）
+        に保存され、同じ画像・同じ条件なら再利用される。
+
+    store に AssetStore を渡すと (data_url のみ)、画像本体は store に登録し、
+    <img data-molib-asset="..."> で参照するだけの HTML を返す。
     """
     path = Path(input_path)
     
     if not path.is_file():
         raise FileNotFoundError(f"画像ファイルが見つかりません: {path}")
 
-    with Image.open(path) as img:
-        img_w, img_h = img.size
+    key = _file_key(path)
+    img_w, img_h = _cached_image_size(path, key)
 
     w_px = _parse_px(width)
     h_px = _parse_px(height)
@@ -69,8 +585,26 @@ def get_image_html(
     alt_escaped = html.escape(alt_name)
 
     if mode == "data_url":
-        data = path.read_bytes()
-        b64 = base64.b64encode(data).decode("ascii")
+        w_attr = img_w
+        h_attr = img_h
+        if _parse_px(computed_width) is not None:
+            w_attr = int(round(_parse_px(computed_width)))
+        if _parse_px(computed_height) is not None:
+            h_attr = int(round(_parse_px(computed_height))) 
+
+        src_path, src_key, mime = path, key, _image_mime(path)
+
+        if optimize:
+            if image_format not in _OPTIMIZE_FORMATS:
+                raise ValueError(f"未知の image_format: {image_format!r}")
+
+            target = (
+                max(1, min(img_w, int(round(w_attr * dpr)))),
+                max(1, min(img_h, int(round(h_attr * dpr)))),
+            )
+            src_path, mime = _optimized_image(path, key, target, image_format, quality, cache_dir)
+            if src_path != path:
+                src_key = _file_key(src_path)
 
         style_parts = ["max-width:none", "height:auto"]
         if computed_width is not None:
@@ -82,15 +616,13 @@ def get_image_html(
 
         style_attr = "; ".join(style_parts)
 
-        w_attr = img_w
-        h_attr = img_h
-        if _parse_px(computed_width) is not None:
-            w_attr = int(round(_parse_px(computed_width)))
-        if _parse_px(computed_height) is not None:
-            h_attr = int(round(_parse_px(computed_height))) 
+        if store is not None:
+            src_attr = f'data-molib-asset="{store.add_file(src_path, mime)}"'
+        else:
+            src_attr = f'src="data:{mime};base64,{_cached_b64(src_path, src_key)}"'
 
         html_text = (
-            f'<img src="data:image/png;base64,{b64}" '
+            f'<img {src_attr} '
             f'alt="{alt_escaped}" '
             f'width="{w_attr}" height="{h_attr}" '
             f'style="{style_attr}" />'
@@ -98,6 +630,8 @@ def get_image_html(
         return html_text
 
     if mode == "file_src":
+        import marimo as mo
+
         if computed_height is None:
             return mo.image(src=path, width=computed_width, rounded=rounded)
 
@@ -115,42 +649,379 @@ def get_image_html(
 
     raise ValueError(f"未知の mode: {mode!r}")
 
-def get_video_html(
-    input_path: str,
-    *,
-    width: Optional[str] = None,       
-    controls: bool = True,
-    autoplay: bool = False,
-    loop: bool = False,
-    muted: bool = False,
-    mode: Literal["data_url", "file_src"] = "data_url",
+async def get_image_html_async(
+    input_path: str = "images.png",
+    alt_name: str = "サンプル画像",
+    **kwargs: Any,
 ) -> str:
     """
-    動画ファイルから <video> タグのHTMLを生成する。
+    get_image_html の async 版。読み込み・エンコードをスレッドプールで行う。
+    marimo の async セルで asyncio.gather と組み合わせると、複数画像を並行に処理できる。
 
-    mode="data_url" : <source src="data:video/mp4;base64,...">（HTML単体で完結）
-    mode="file_src" : <source src="notebook/.../xxx.mp4">（通常のファイル参照）
+    例:
+        htmls = await asyncio.gather(*[get_image_html_async(p, width=300) for p in paths])
+    """
+    return await asyncio.to_thread(get_image_html, input_path, alt_name, **kwargs)
+
+
+ImageSpec = Union[str, Path, Dict[str, Any]]
+
+
+def _image_spec_kwargs(spec: ImageSpec) -> Dict[str, Any]:
+    if isinstance(spec, (str, Path)):
+        return {"input_path": str(spec)}
+    return dict(spec)
+
+
+class _CacheMiss(Exception):
+    """_cache_only が有効なときに、キャッシュに無い処理が必要になったことを表す。"""
+
+
+# True の間、キャッシュに無いサイズ取得・エンコード・縮小は行わずに _CacheMiss を送出する
+_cache_only: contextvars.ContextVar[bool] = contextvars.ContextVar("marimo_lib_image_cache_only", default=False)
+
+# None 以外の間、サイズ取得・エンコードの結果を (種類, キー, 値) として追記する
+_cache_log: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("marimo_lib_image_cache_log", default=None)
+
+
+def _log_cache(kind: str, key: FileKey, value: Any) -> None:
+    log = _cache_log.get()
+    if log is not None:
+        log.append((kind, key, value))
+
+
+def _render_cached(kwargs: Dict[str, Any]) -> Optional[str]:
+    """キャッシュだけで get_image_html を作れれば返す。足りなければ None。"""
+    token = _cache_only.set(True)
+    try:
+        return get_image_html(**kwargs)
+    except _CacheMiss:
+        return None
+    finally:
+        _cache_only.reset(token)
+
+
+def _image_cache_worker(kwargs: Dict[str, Any]) -> list:
+    """
+    子プロセスで get_image_html を実行し、HTML ではなくサイズ・base64 のキャッシュ項目を返す。
+    親はこれを自分のキャッシュに入れてから HTML を作る（再実行時は親のキャッシュだけで済む）。
+    """
+    log: list = []
+    token = _cache_log.set(log)
+    try:
+        get_image_html(**kwargs)
+    finally:
+        _cache_log.reset(token)
+    return log
+
+
+# キャッシュに無い画像がこれより少なければ、プロセスプールを使わずに本プロセスで処理する
+_BATCH_POOL_MIN = 4
+
+
+@profiled
+def get_image_html_batch(
+    specs: Sequence[ImageSpec],
+    *,
+    max_workers: Optional[int] = None,
+    **common: Any,
+) -> List[str]:
+    """
+    複数の画像をプロセスプールで並列に処理し、get_image_html の結果を入力順のリストで返す。
+
+    specs の各要素はファイルパス、または get_image_html の引数 dict
+    （input_path 必須）。common は全要素に共通の引数で、要素側の指定が優先。
+
+    サイズ・base64 のキャッシュ（と optimize=True のディスクキャッシュ）で作れる要素は
+    本プロセスでそのまま作り、キャッシュに無い要素だけを子プロセスで処理する。
+    子プロセスの結果は本プロセスのキャッシュに入れるので、marimo の再実行では
+    プロセスプールを起動しない。キャッシュに無い要素が _BATCH_POOL_MIN 個未満のときも
+    プロセスプールは使わない。
+    mode="file_src" の要素と store に AssetStore を渡した要素の HTML は本プロセスで作る。
+
+    例:
+        htmls = get_image_html_batch(
+            ["figs/a.png", {"input_path": "figs/b.png", "width": 400}],
+            optimize=True,
+            width=200,
+        )
+    """
+    jobs = [{**common, **_image_spec_kwargs(spec)} for spec in specs]
+    results: List[Any] = [None] * len(jobs)
+
+    misses = []
+    for i, kw in enumerate(jobs):
+        if kw.get("mode", "data_url") == "data_url":
+            results[i] = _render_cached(kw)
+        if results[i] is None:
+            misses.append(i)
+
+    remote = [i for i in misses if jobs[i].get("mode", "data_url") == "data_url"]
+
+    if max_workers != 1 and len(remote) >= _BATCH_POOL_MIN:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # AssetStore はロックを持ち pickle できないので渡さない（子プロセスはキャッシュを作るだけ）
+        remote_jobs = [{k: v for k, v in jobs[i].items() if k != "store"} for i in remote]
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for log in pool.map(_image_cache_worker, remote_jobs):
+                for kind, key, value in log:
+                    if kind == "size":
+                        _size_cache.put(key, value, 64)
+                    else:
+                        _b64_cache.put(key, value, len(value))
+
+    for i in misses:
+        results[i] = get_image_html(**jobs[i])
+
+    return results
+
+
+_VIDEO_MIME = {
+    ".mp4": "video/mp4",
+    ".m4v": "video/mp4",
+    ".mov": "video/quicktime",
+    ".webm": "video/webm",
+    ".mkv": "video/x-matroska",
+    ".ogv": "video/ogg",
+    ".ogg": "video/ogg",
+    ".avi": "video/x-msvideo",
+}
+
+
+@profiled
+def detect_video_mime(input_path: Union[str, Path]) -> str:
+    """
+    ファイル先頭のシグネチャから動画の MIME タイプを判定する。
+    判定できなければ拡張子、それも不明なら video/mp4。
+    """
+    path = Path(input_path)
+    with open(path, "rb") as f:
+        head = f.read(64)
+
+    if head[4:8] == b"ftyp":
+        return "video/quicktime" if head[8:12] == b"qt  " else "video/mp4"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "video/webm" if b"webm" in head else "video/x-matroska"
+    if head[:4] == b"OggS":
+        return "video/ogg"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "video/x-msvideo"
+
+    return _VIDEO_MIME.get(path.suffix.lower(), "video/mp4")
+
+
+def _ffmpeg() -> Optional[str]:
+    return shutil.which("ffmpeg")
+
+
+def _run_ffmpeg(cmd: List[str], out: Path) -> None:
+    """ffmpeg を実行し、失敗したとき（終了コード・出力が空）は標準エラーを添えて RuntimeError にする。"""
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0 or not out.is_file() or out.stat().st_size == 0:
+        detail = proc.stderr.strip() or "no output file was written"
+        raise RuntimeError(f"ffmpeg failed (exit status {proc.returncode}) for {out.name}: {detail}")
+
+
+@profiled
+def prepare_video(
+    input_path: Union[str, Path],
+    *,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    max_height: Optional[int] = None,
+    max_bitrate: Optional[Union[int, str]] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> Path:
+    """
+    埋め込み用に動画を切り出し・縮小・ビットレート制限して H.264/mp4 にする（ffmpeg を使用）。
+
+    start, end : 切り出す範囲（秒）
+    max_height : 高さの上限（px、縦横比は保持。元より大きくはしない）
+    max_bitrate: 映像ビットレートの上限（例: 1_000_000, "1M"）
+
+    変換結果は cache_dir/videos に元ファイルの (path, mtime, size) と
+    条件から決めた名前で保存し、同じ条件なら再利用する。
+    条件が何も無ければ元のパスをそのまま返す。
     """
     path = Path(input_path)
 
     if not path.is_file():
         raise FileNotFoundError(f"動画ファイルが見つかりません: {path}")
 
-    src_attr: str
+    if start is None and end is None and max_height is None and max_bitrate is None:
+        return path
 
-    if mode == "data_url":
-        # 動画ファイルを base64 にして data URL にする
-        data = path.read_bytes()
-        b64 = base64.b64encode(data).decode("ascii")
-        # mp4 前提。必要なら拡張子で切り替えてもOK
-        src_attr = f"data:video/mp4;base64,{b64}"
-    elif mode == "file_src":
-        # パスをそのまま src として使う
-        src_attr = html.escape(str(path))
-    else:
-        raise ValueError(f"未知の mode: {mode!r}")
+    options = (start, end, max_height, max_bitrate)
+    digest = hashlib.sha1(repr((_file_key(path), options)).encode("utf-8")).hexdigest()
+    out = _cache_dir(cache_dir) / "videos" / f"{digest}.mp4"
+
+    if out.is_file():
+        _touch(out)
+        return out
+
+    ffmpeg = _ffmpeg()
+    if ffmpeg is None:
+        raise RuntimeError("動画の変換には ffmpeg が必要です（PATH に見つかりません）")
+
+    cmd = [ffmpeg, "-y", "-loglevel", "error"]
+    if start is not None:
+        cmd += ["-ss", str(start)]
+    cmd += ["-i", str(path)]
+    if end is not None:
+        cmd += ["-t", str(end - (start or 0))]
+    if max_height is not None:
+        cmd += ["-vf", f"scale=-2:'min({int(max_height)},ih)'"]
+    if max_bitrate is not None:
+        cmd += ["-b:v", str(max_bitrate), "-maxrate", str(max_bitrate), "-bufsize", str(max_bitrate)]
+    cmd += [
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-movflags", "+faststart",
+    ]
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f"{out.stem}.{os.getpid()}.{threading.get_ident()}.tmp.mp4")
+    try:
+        _run_ffmpeg(cmd + [str(tmp)], tmp)
+        os.replace(tmp, out)
+    finally:
+        tmp.unlink(missing_ok=True)
 
-    # 属性を組み立て
+    _prune_disk_cache(_cache_dir(cache_dir), out)
+    return out
+
+
+@profiled
+def extract_poster_frame(
+    input_path: Union[str, Path],
+    *,
+    at: float = 0.0,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> Optional[Path]:
+    """
+    動画の at 秒目のフレームを JPEG として取り出し、そのパスを返す。
+
+    ffmpeg があればそれを使い、無ければ OpenCV (cv2) を試す。
+    どちらも使えなければ None。結果は cache_dir/posters にキャッシュする。
+    ffmpeg / OpenCV が画像を書き出せなかったときは RuntimeError。
+    """
+    path = Path(input_path)
+
+    digest = hashlib.sha1(repr((_file_key(path), at)).encode("utf-8")).hexdigest()
+    out = _cache_dir(cache_dir) / "posters" / f"{digest}.jpg"
+
+    if out.is_file():
+        _touch(out)
+        return out
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f"{out.stem}.{os.getpid()}.{threading.get_ident()}.tmp.jpg")
+
+    ffmpeg = _ffmpeg()
+    if ffmpeg is not None:
+        cmd = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-ss", str(at), "-i", str(path),
+            "-frames:v", "1", "-q:v", "3", str(tmp),
+        ]
+        try:
+            _run_ffmpeg(cmd, tmp)
+            os.replace(tmp, out)
+        finally:
+            tmp.unlink(missing_ok=True)
+        _prune_disk_cache(_cache_dir(cache_dir), out)
+        return out
+
+    try:
+        import cv2
+    except ImportError:
+        return None
+
+    cap = cv2.VideoCapture(str(path))
+    try:
+        cap.set(cv2.CAP_PROP_POS_MSEC, at * 1000.0)
+        ok, frame = cap.read()
+    finally:
+        cap.release()
+
+    if not ok:
+        return None
+
+    if not cv2.imwrite(str(tmp), frame):
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"OpenCV could not write the poster frame of {path} to {out.parent}")
+    os.replace(tmp, out)
+    _prune_disk_cache(_cache_dir(cache_dir), out)
+    return out
+
+
+def _video_source(
+    path: Path,
+    *,
+    mode: str,
+    poster: Union[bool, str, Path, None],
+    start: Optional[float],
+    end: Optional[float],
+    max_height: Optional[int],
+    max_bitrate: Optional[Union[int, str]],
+    cache_dir: Optional[Union[str, Path]],
+) -> Tuple[Path, str, Optional[str]]:
+    """
+    前処理後の動画パス・MIME・poster 属性値を返す。
+
+    poster=True で取り出したフレームは、mode によらず data URL にする
+    （キャッシュディレクトリのファイルはノートブックのページから参照できないため）。
+    同じ理由で、mode="file_src" で動画を変換する場合は cache_dir をノートブックから
+    参照できる場所に指定する必要がある。
+    """
+    if not path.is_file():
+        raise FileNotFoundError(f"動画ファイルが見つかりません: {path}")
+
+    converts = not (start is None and end is None and max_height is None and max_bitrate is None)
+    if mode == "file_src" and converts and cache_dir is None:
+        raise ValueError(
+            "mode='file_src' cannot reference a converted video in the default cache directory; "
+            "use mode='data_url' or pass a cache_dir the notebook can serve"
+        )
+
+    src_path = prepare_video(
+        path,
+        start=start,
+        end=end,
+        max_height=max_height,
+        max_bitrate=max_bitrate,
+        cache_dir=cache_dir,
+    )
+    mime = detect_video_mime(src_path)
+
+    poster_path: Optional[Path] = None
+    if poster is True:
+        poster_path = extract_poster_frame(src_path, cache_dir=cache_dir)
+    elif poster:
+        poster_path = Path(poster)
+
+    poster_attr: Optional[str] = None
+    if poster_path is not None:
+        if mode == "data_url" or poster is True:
+            poster_attr = f"data:{_image_mime(poster_path)};base64,{_cached_b64(poster_path, _file_key(poster_path))}"
+        else:
+            poster_attr = html.escape(str(poster_path))
+
+    return src_path, mime, poster_attr
+
+
+def _video_tag_parts(
+    *,
+    width: Optional[str],
+    controls: bool,
+    autoplay: bool,
+    loop: bool,
+    muted: bool,
+    mime: str = "video/mp4",
+    poster: Optional[str] = None,
+) -> Tuple[str, str]:
+    """<video> タグを src の前後 2 つに分けて返す。"""
     attr_list = []
 
     if controls:
@@ -161,6 +1032,8 @@ def get_video_html(
         attr_list.append("loop")
     if muted:
         attr_list.append("muted")
+    if poster is not None:
+        attr_list.append(f'poster="{poster}" preload="none"')
 
     style_parts = ["max-width:100%", "height:auto"]
     if width is not None:
@@ -169,21 +1042,269 @@ def get_video_html(
 
     attrs = " ".join(attr_list)
 
-    html_text = (
-        f'<video {attrs} style="{style_attr}">'
-        f'<source src="{src_attr}" type="video/mp4" />'
+    head = f'<video {attrs} style="{style_attr}"><source src="'
+    tail = (
+        f'" type="{mime}" />'
         "お使いのブラウザは video タグをサポートしていません。"
         "</video>"
     )
-    return html_text
+    return head, tail
 
 
+@profiled
+def get_video_html(
+    input_path: str,
+    *,
+    width: Optional[str] = None,       
+    controls: bool = True,
+    autoplay: bool = False,
+    loop: bool = False,
+    muted: bool = False,
+    mode: Literal["data_url", "file_src"] = "data_url",
+    poster: Union[bool, str, Path, None] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    max_height: Optional[int] = None,
+    max_bitrate: Optional[Union[int, str]] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> str:
+    """
+    動画ファイルから <video> タグのHTMLを生成する。
+
+    mode="data_url" : <source src="data:video/...;base64,...">（HTML単体で完結）
+    mode="file_src" : <source src="notebook/.../xxx.mp4">（通常のファイル参照）
+
+    MIME タイプはファイル先頭のシグネチャから判定する。
+    start / end / max_height / max_bitrate を指定すると prepare_video で
+    切り出し・縮小した動画を使う。poster=True で先頭フレームを、
+    poster="xxx.jpg" で指定画像を poster（再生前の表示）にする。
+    poster=True のフレームは常に data URL で埋め込む。mode="file_src" で
+    切り出し・縮小する場合は、ノートブックから参照できる cache_dir が必要
+    （未指定だと ValueError）。
+
+    大きな動画を data URL にする場合は、メモリに載せずに書き出せる
+    write_video_html を使う。
+    """
+    path, mime, poster_attr = _video_source(
+        Path(input_path),
+        mode=mode,
+        poster=poster,
+        start=start,
+        end=end,
+        max_height=max_height,
+        max_bitrate=max_bitrate,
+        cache_dir=cache_dir,
+    )
+
+    src_attr: str
+
+    if mode == "data_url":
+        # 動画ファイルを base64 にして data URL にする
+        src_attr = f"data:{mime};base64,{_encode_file_b64(path)}"
+    elif mode == "file_src":
+        # パスをそのまま src として使う
+        src_attr = html.escape(str(path))
+    else:
+        raise ValueError(f"未知の mode: {mode!r}")
+
+    head, tail = _video_tag_parts(
+        width=width,
+        controls=controls,
+        autoplay=autoplay,
+        loop=loop,
+        muted=muted,
+        mime=mime,
+        poster=poster_attr,
+    )
+    return f"{head}{src_attr}{tail}"
+
+
+async def get_video_html_async(input_path: str, **kwargs: Any) -> str:
+    """
+    get_video_html の async 版。読み込み・エンコードをスレッドプールで行う。
+    """
+    return await asyncio.to_thread(get_video_html, input_path, **kwargs)
+
+
+@profiled
+def write_video_html(
+    input_path: str,
+    sink: Union[str, Path, IO[str], IO[bytes]],
+    *,
+    width: Optional[str] = None,
+    controls: bool = True,
+    autoplay: bool = False,
+    loop: bool = False,
+    muted: bool = False,
+    poster: Union[bool, str, Path, None] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    max_height: Optional[int] = None,
+    max_bitrate: Optional[Union[int, str]] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+    chunk_size: int = _ENCODE_CHUNK,
+) -> int:
+    """
+    get_video_html(mode="data_url") と同じ HTML を、動画全体をメモリに載せずに書き出す。
+
+    動画を chunk_size バイトずつ読んで base64 にし、そのまま sink に書くので、
+    動画の大きさによらずメモリ使用量は chunk_size 程度で一定。
+    sink はファイルパス、またはテキスト/バイナリの file-like オブジェクト。
+    書き出した文字数を返す。
+
+    例:
+        write_video_html("notebook/movie/run01.mp4", "notebook/figs/run01_video.html")
+    """
+    path, mime, poster_attr = _video_source(
+        Path(input_path),
+        mode="data_url",
+        poster=poster,
+        start=start,
+        end=end,
+        max_height=max_height,
+        max_bitrate=max_bitrate,
+        cache_dir=cache_dir,
+    )
+
+    # base64 を 4 文字単位で区切るため 3 の倍数にそろえる
+    chunk_size = max(3, chunk_size - chunk_size % 3)
+
+    head, tail = _video_tag_parts(
+        width=width,
+        controls=controls,
+        autoplay=autoplay,
+        loop=loop,
+        muted=muted,
+        mime=mime,
+        poster=poster_attr,
+    )
+
+    with contextlib.ExitStack() as stack:
+        if isinstance(sink, (str, Path)):
+            sink = stack.enter_context(open(sink, "w", encoding="utf-8"))
+
+        binary = isinstance(sink, (io.RawIOBase, io.BufferedIOBase)) or "b" in getattr(sink, "mode", "")
+
+        def write(text: str) -> None:
+            sink.write(text.encode("utf-8") if binary else text)
+
+        n = 0
+        for text in (head, f"data:{mime};base64,"):
+            write(text)
+            n += len(text)
+
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                record_io(read=len(chunk))
+                text = base64.b64encode(chunk).decode("ascii")
+                write(text)
+                n += len(text)
+
+        write(tail)
+        n += len(tail)
+
+    record_io(written=n)
+    return n
+
+
+_PLOTLYJS_INLINE = re.compile(r"<script[^>]*>\s*/\*\*\s*\*\s*plotly\.js v")
+
+
+_LAZY_IFRAME_JS = """
+(function () {
+  if (window.molibLazyFrames) return;
+  window.molibLazyFrames = true;
+  function load(el) {
+    el.setAttribute(el.dataset.molibLazy, el.dataset.molibPayload);
+    el.removeAttribute("data-molib-payload");
+    el.removeAttribute("data-molib-lazy");
+  }
+  var io = "IntersectionObserver" in window ? new IntersectionObserver(function (entries) {
+    entries.forEach(function (e) {
+      if (e.isIntersecting) { io.unobserve(e.target); load(e.target); }
+    });
+  }, {rootMargin: "200px"}) : null;
+  function scan() {
+    document.querySelectorAll("iframe[data-molib-lazy]:not([data-molib-watched])").forEach(function (el) {
+      el.setAttribute("data-molib-watched", "1");
+      if (io) io.observe(el); else load(el);
+    });
+  }
+  scan();
+  var pending = false;
+  new MutationObserver(function () {
+    if (!pending) { pending = true; requestAnimationFrame(function () { pending = false; scan(); }); }
+  }).observe(document.documentElement, {childList: true, subtree: true});
+})();
+"""
+
+
+# iframe 内で親ページの AssetStore から plotly.js を読み込む。%s はアセットのキー。
+# 親のローダー（molibAssetURL）がまだ無ければアセットの定義を直接読み、
+# それも無ければ（store.html() のセルが未表示など）出てくるまで待って iframe を読み直す。
+_IFRAME_ASSET_JS = """
+(function (key) {
+  function find() {
+    try {
+      var p = window.parent;
+      if (typeof p.molibAssetURL === "function" && p.molibAssetURL(key)) return p;
+      return p.document.getElementById("molib-asset-" + key);
+    } catch (e) {
+      return null;  // 親ページが別オリジン
+    }
+  }
+  function url(found) {
+    if (found.nodeType !== 1) return found.molibAssetURL(key);
+    var bin = atob(found.textContent.trim());
+    var buf = new Uint8Array(bin.length);
+    for (var i = 0; i < bin.length; i++) buf[i] = bin.charCodeAt(i);
+    return URL.createObjectURL(new Blob([buf], {type: found.dataset.mime}));
+  }
+  var found = find();
+  if (found) {
+    document.write('<script src="' + url(found) + '"><\\/script>');
+    return;
+  }
+  document.write('<p style="font:12px sans-serif;color:#888">plotly.js を待っています' +
+                 '（AssetStore.html() を表示したセルが必要です）</p>');
+  var tries = 0;
+  var timer = setInterval(function () {
+    if (find()) { clearInterval(timer); location.reload(); }
+    else if (++tries >= 150) clearInterval(timer);
+  }, 200);
+})("%s");
+"""
+
+
+def _split_inline_plotlyjs(html_text: str) -> Optional[Tuple[str, str, str]]:
+    """
+    HTML 内に丸ごと埋め込まれた plotly.js の <script> を探し、
+    (その前の HTML, plotly.js 本体, その後の HTML) を返す。見つからなければ None。
+    """
+    m = _PLOTLYJS_INLINE.search(html_text)
+    if m is None:
+        return None
+
+    body_start = html_text.index(">", m.start()) + 1
+    end = html_text.find("</script>", body_start)
+    if end < 0:
+        return None
+
+    return html_text[:m.start()], html_text[body_start:end], html_text[end + 9:]
+
+
+@profiled
 def get_plotly_iframe_html(
     html_text: str,
     *,
     width: str = "1290px",
     height: str = "515px",
     mode: Literal["srcdoc", "data_url"] = "data_url",
+    store: Optional[AssetStore] = None,
+    lazy: bool = False,
 ) -> str:
     """
     Plotly が埋め込まれた HTML 文字列を <iframe> に包んで返す。
@@ -196,28 +1317,185 @@ def get_plotly_iframe_html(
         <iframe srcdoc="..."> 形式。
         こちらも外部ファイルには依存しないが、
         HTML 内にエスケープした中身を直接埋め込む。
+
+    store に AssetStore を渡すと、HTML 内の plotly.js 本体を store に登録し、
+    iframe 側は親ページの blob URL から読み込む（図が何枚あっても plotly.js は 1 回分）。
+    親ページと同一オリジンである必要があるため、この場合は srcdoc 形式になる。
+    store.html() のセルがまだ表示されていなければ、表示されるまで（最大 30 秒）待ってから描画する。
+
+    lazy=True では iframe に loading="lazy" を付け、中身は data 属性に置いたままにする。
+    iframe が表示領域に入った時点で src / srcdoc に移すので、
+    それまでは width × height の空枠として場所だけ確保される。
     """
 
+    if store is not None:
+        parts = _split_inline_plotlyjs(html_text)
+
+        if parts is not None:
+            before, plotlyjs, after = parts
+            key = store.add_bytes(plotlyjs.encode("utf-8"), "text/javascript")
+            # 親ページのアセットから作った blob URL を同期的に読み込む
+            loader = f"<script>{_IFRAME_ASSET_JS % key}</script>"
+            html_text = before + loader + after
+
+        mode = "srcdoc"
+
     if mode == "data_url":
         # HTML 全体を base64 にして data URL にする
         b64 = base64.b64encode(html_text.encode("utf-8")).decode("ascii")
-        src = f"data:text/html;base64,{b64}"
-        iframe = (
-            f'<iframe src="{src}" '
-            f'width="{width}" height="{height}" '
-            f'style="border:none;"></iframe>'
-        )
-        return iframe
+        attr, value = "src", f"data:text/html;base64,{b64}"
 
     elif mode == "srcdoc":
         # srcdoc 用に HTML を属性値としてエスケープ
-        srcdoc = html.escape(html_text, quote=True)
+        attr, value = "srcdoc", html.escape(html_text, quote=True)
+
+    else:
+        raise ValueError(f"未知の mode: {mode!r}")
+
+    if not lazy:
         iframe = (
-            f'<iframe srcdoc="{srcdoc}" '
+            f'<iframe {attr}="{value}" '
             f'width="{width}" height="{height}" '
             f'style="border:none;"></iframe>'
         )
         return iframe
 
+    iframe = (
+        f'<iframe loading="lazy" data-molib-lazy="{attr}" data-molib-payload="{value}" '
+        f'width="{width}" height="{height}" '
+        f'style="border:none;"></iframe>'
+        f"<script>{_LAZY_IFRAME_JS}</script>"
+    )
+    return iframe
+
+
+_PLOTLY_RENDERER_JS = """
+(function () {
+  if (window.molibPlotly) return;
+  var SELECTOR = 'script[type="application/json"][data-molib-plotly]';
+  function draw(s) {
+    var div = document.getElementById(s.dataset.molibPlotly);
+    if (!div || s.dataset.done) return;
+    s.dataset.done = "1";
+    var fig = JSON.parse(s.textContent);
+    Plotly.newPlot(div, fig.data || [], fig.layout || {}, fig.config || {responsive: true});
+  }
+  // lazy な図は表示領域（スライドの表示を含む）に入ったときに描画する
+  var io = "IntersectionObserver" in window ? new IntersectionObserver(function (entries) {
+    entries.forEach(function (e) {
+      if (!e.isIntersecting) return;
+      io.unobserve(e.target);
+      var s = document.querySelector('script[data-molib-plotly="' + e.target.id + '"]');
+      if (s) draw(s);
+    });
+  }, {rootMargin: "200px"}) : null;
+  // plotly.js を待つ。ランタイムが読み込む <script> があればその load を待ち、
+  // 無ければ（別途読み込む場合）タイマー 1 本で回数を限って確認する
+  var waiting = false, retries = 0;
+  function waitPlotly() {
+    if (waiting) return;
+    var tag = document.querySelector("script[data-molib-plotlyjs]");
+    if (tag && tag.src) {
+      waiting = true;
+      tag.addEventListener("load", function () { waiting = false; render(); }, {once: true});
+      return;
+    }
+    if (retries >= 200) return;
+    retries += 1;
+    waiting = true;
+    setTimeout(function () { waiting = false; render(); }, 50);
+  }
+  function render() {
+    if (!window.Plotly) { waitPlotly(); return; }
+    document.querySelectorAll(SELECTOR).forEach(function (s) {
+      if (s.dataset.done || s.dataset.watched) return;
+      var div = document.getElementById(s.dataset.molibPlotly);
+      if (!div) return;
+      if (s.dataset.lazy && io) { s.dataset.watched = "1"; io.observe(div); return; }
+      draw(s);
+    });
+  }
+  window.molibPlotly = {render: render};
+  render();
+  var pending = false;
+  new MutationObserver(function () {
+    if (!pending) { pending = true; requestAnimationFrame(function () { pending = false; render(); }); }
+  }).observe(document.documentElement, {childList: true, subtree: true});
+})();
+"""
+
+_plotly_div_ids = itertools.count()
+
+
+@profiled
+def get_plotly_runtime_html(
+    include_plotlyjs: Literal["cdn", "inline", False] = "cdn",
+) -> str:
+    """
+    get_plotly_div_html で埋め込んだ図を描画する共通ランタイムを返す。
+    ページ内で 1 回だけ表示すればよい（複数回表示しても 2 回目以降は何もしない）。
+
+    include_plotlyjs="cdn"    : plotly.js を CDN から読み込む
+    include_plotlyjs="inline" : plotly.js 本体を埋め込む（オフラインでも表示できる）
+    include_plotlyjs=False    : plotly.js は別途読み込まれている前提
+    """
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+    if include_plotlyjs == "cdn":
+        plotlyjs = (
+            f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js" '
+            'charset="utf-8" data-molib-plotlyjs></script>'
+        )
+    elif include_plotlyjs == "inline":
+        plotlyjs = f'<script charset="utf-8" data-molib-plotlyjs>{get_plotlyjs()}</script>'
+    elif include_plotlyjs is False:
+        plotlyjs = ""
     else:
-        raise ValueError(f"未知の mode: {mode!r}")
\ No newline at end of file
+        raise ValueError(f"未知の include_plotlyjs: {include_plotlyjs!r}")
+
+    return f"{plotlyjs}<script>{_PLOTLY_RENDERER_JS}</script>"
+
+
+@profiled
+def get_plotly_div_html(
+    fig: Any,
+    *,
+    width: str = "1290px",
+    height: str = "515px",
+    div_id: Optional[str] = None,
+    config: Optional[Dict[str, Any]] = None,
+    lazy: bool = False,
+) -> str:
+    """
+    Plotly の図を <div> と JSON ペイロードだけで埋め込む HTML を返す。
+
+    get_plotly_iframe_html と違い、plotly.js も HTML 文書も図ごとには持たず、
+    ページ内の共通ランタイム（get_plotly_runtime_html）が 1 つの plotly.js で
+    すべての図を描画する。埋め込まれるのは図のデータとレイアウトだけ。
+
+    lazy=True の図は、スクロールやスライド切り替えで表示領域に入るまで描画しない
+    （それまでは width × height の空の枠だけを置く）。
+
+    例:
+        mo.Html(get_plotly_runtime_html())          # ページ内で 1 回
+        mo.Html(get_plotly_div_html(fig, height="400px"))
+    """
+    import plotly.io as pio
+
+    if div_id is None:
+        div_id = f"molib-plotly-{os.getpid()}-{next(_plotly_div_ids)}"
+
+    fig_dict = fig.to_plotly_json() if hasattr(fig, "to_plotly_json") else dict(fig)
+    if config is not None:
+        fig_dict = {**fig_dict, "config": config}
+
+    # </script> で途切れないようにする
+    payload = pio.to_json(fig_dict, validate=False).replace("</", "<\\/")
+
+    lazy_attr = ' data-lazy="1"' if lazy else ""
+
+    return (
+        f'<div id="{div_id}" class="molib-plotly" style="width:{width}; height:{height};"></div>'
+        f'<script type="application/json" data-molib-plotly="{div_id}"{lazy_attr}>{payload}</script>'
+        "<script>window.molibPlotly && window.molibPlotly.render();</script>"
+    )
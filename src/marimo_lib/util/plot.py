@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 try:
     import json5 as _json
 except Exception:
@@ -5,19 +7,33 @@ except Exception:
 
 import re
 import numpy as np
-import pandas as pd
 import plotly.graph_objs as go
 from typing import Tuple, Dict
 from typing import List, Any, Optional
 import plotly.io as pio
+import asyncio
 import base64
 import os
 import time
 from typing import Callable
 import inspect
+from .profiling import profiled, record_io
+
+_renderer_ready = False
+
+
+def _ensure_renderer() -> None:
+    """
+    fig.show() の出力先をブラウザにする。設定自体が重い (~0.5 s) ので import 時には行わず、
+    図を作る・保存する入口（add_sub_plot, save_fig_as_html, add_schedule など）で最初に 1 回だけ行う。
+    """
+    global _renderer_ready
 
-pio.renderers.default = "browser"
+    if not _renderer_ready:
+        pio.renderers.default = "browser"
+        _renderer_ready = True
 
+@profiled
 def save_fig_as_html(
     fig: go.Figure, 
     savepath: str = "notebook/figs/figure.html"
@@ -43,6 +59,7 @@ def save_fig_as_html(
     str : 
         Output file path to the saved HTML file.
     """
+    _ensure_renderer()
 
     dirpath = os.path.dirname(savepath)
     if dirpath and not os.path.exists(dirpath):
@@ -62,10 +79,12 @@ def save_fig_as_html(
         full_html=True,
         auto_open=False,
     )
+    record_io(written=os.path.getsize(savepath))
 
     return savepath
 
 
+@profiled
 def load_html_as_str(input_path:str =  "notebook/figs/figure.html") -> str:
     """
     HTMLを読み込む関数
@@ -84,10 +103,401 @@ def load_html_as_str(input_path:str =  "notebook/figs/figure.html") -> str:
     """
     with open(input_path, "r", encoding="utf-8") as f:
         html = f.read()
+    record_io(read=os.path.getsize(input_path))
 
     return html
 
 
+async def load_html_as_str_async(input_path:str =  "notebook/figs/figure.html") -> str:
+    """
+    load_html_as_str の async 版。ファイル読み込みをスレッドプールで行う。
+
+    Async version of load_html_as_str. The file is read in a worker thread.
+
+    Parameters
+    ----------
+    input_path : 
+        Input file path 
+
+    Returns
+    -------
+    str: 
+        String型に格納されたHTMLテキスト
+    """
+    return await asyncio.to_thread(load_html_as_str, input_path)
+
+
+def _fingerprint_value(h, value: Any) -> None:
+    """トレースのプロパティ（dict / list / ndarray / スカラー）を再帰的にハッシュへ流し込む。"""
+    if isinstance(value, np.ndarray):
+        h.update(f"nd{value.dtype.str}{value.shape}".encode("ascii"))
+        h.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else repr(value.tolist()).encode("utf-8"))
+    elif isinstance(value, dict):
+        h.update(b"{")
+        for k in sorted(value):
+            h.update(str(k).encode("utf-8") + b":")
+            _fingerprint_value(h, value[k])
+        h.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        arr = np.asarray(value) if value and not isinstance(value[0], (dict, list, tuple)) else None
+        if arr is not None and arr.dtype.kind in "biuf":
+            _fingerprint_value(h, arr)
+        else:
+            h.update(b"[")
+            for v in value:
+                _fingerprint_value(h, v)
+            h.update(b"]")
+    else:
+        h.update(repr(value).encode("utf-8") + b";")
+
+
+def _trace_fingerprint(props: Dict[str, Any]) -> str:
+    import hashlib
+
+    h = hashlib.blake2b(digest_size=16)
+    _fingerprint_value(h, props)
+    return h.hexdigest()
+
+
+def _json_member(key: str, value: Any) -> str:
+    """
+    pio.to_json で {key: value} を JSON にし、value の部分だけを返す。
+    pio.to_html と同じエンジン・同じエスケープ（<script> に埋め込める形）になり、uid は取り除かれる。
+    """
+    text = pio.to_json({key: value}, validate=False)
+    prefix = f'{{"{key}":'
+    if not (text.startswith(prefix) and text.endswith("}")):
+        raise ValueError(f"unexpected output from pio.to_json: {text[:40]!r}")
+    return text[len(prefix):-1]
+
+
+class IncrementalHTMLWriter:
+    """
+    同じ図を繰り返し HTML に保存するための書き出し器。
+
+    トレースごとに JSON を保持しておき、前回から変わったトレースだけを JSON にし直す。
+    変更の検出はトレースのプロパティ（NumPy 配列はバイト列）のハッシュで行うので、
+    数本のトレースだけが変わるダッシュボードの定期保存では、コストが変更分に比例する。
+    plotly.js の読み込み部分（数 MB）も 1 回だけ作って使い回す。
+
+    出力は pio.write_html(full_html=True) と同じ構成（plotly-graph-div の div と
+    Plotly.newPlot(id, [data], {layout}, {config})）なので、get_plotly_values_json で読み戻せる。
+
+    例:
+        writer = IncrementalHTMLWriter("notebook/figs/dashboard.html")
+        while True:
+            update_dashboard(fig)
+            stats = writer.save(fig)      # {"path": ..., "reused": 18, "encoded": 2}
+            time.sleep(300)
+
+    Parameters
+    ----------
+    savepath : 
+        Output file path
+    include_plotlyjs : 
+        pio.to_html の include_plotlyjs と同じ（"inline", "cdn", False など）
+    div_id : 
+        div の id（省略時は UUID。保存のたびに同じ id を使う）
+    config : 
+        Plotly の config
+    stamp_title : 
+        save_fig_as_html と同様にタイトルへ保存時刻（UNIX秒）を付けるか。
+        fig 自体は書き換えない
+    """
+
+    def __init__(
+        self,
+        savepath: str = "notebook/figs/figure.html",
+        *,
+        include_plotlyjs: bool | str = "inline",
+        div_id: str | None = None,
+        config: Dict[str, Any] | None = None,
+        stamp_title: bool = True,
+    ):
+        import uuid
+
+        _ensure_renderer()
+
+        self.savepath = savepath
+        self.include_plotlyjs = include_plotlyjs
+        self.div_id = div_id or str(uuid.uuid4())
+        self.config = config
+        self.stamp_title = stamp_title
+
+        self._blobs: List[Tuple[str, str]] = []  # (fingerprint, JSON) をトレース順に
+        self._shell: Tuple[str, str, str] | None = None
+
+    def _html_shell(self) -> Tuple[str, str, str]:
+        """
+        空の図の HTML を作り、(Plotly.newPlot の data の直前まで, data と layout の間, layout の後ろ) に分ける。
+        """
+        if self._shell is None:
+            html = pio.to_html(
+                go.Figure(),
+                include_plotlyjs=self.include_plotlyjs,
+                full_html=True,
+                div_id=self.div_id,
+                config=self.config,
+            )
+            pos = html.rfind("Plotly.newPlot(")
+            if pos < 0:
+                raise ValueError("Plotly.newPlot(...) not found in the HTML template")
+
+            data_start = html.find("[", pos)
+            _, data_end = extract_bracketed(html, pos, "[", "]")
+            layout_start = html.find("{", data_end)
+            _, layout_end = extract_bracketed(html, data_end, "{", "}")
+
+            self._shell = (html[:data_start], html[data_end:layout_start], html[layout_end:])
+
+        return self._shell
+
+    def _encode_traces(self, fig: go.Figure) -> Tuple[List[str], int]:
+        blobs = []
+        encoded = 0
+
+        for i, trace in enumerate(fig.data):
+            props = trace.to_plotly_json()
+            fp = _trace_fingerprint(props)
+
+            if i < len(self._blobs) and self._blobs[i][0] == fp:
+                blobs.append(self._blobs[i])
+                continue
+
+            # to_dict で typed array を base64 にしてから、pio.to_json と同じ規則で JSON にする
+            trace_dict = go.Figure(data=[props]).to_dict()["data"][0]
+            blobs.append((fp, _json_member("data", [trace_dict])[1:-1]))
+            encoded += 1
+
+        self._blobs = blobs
+        return [blob for _, blob in blobs], encoded
+
+    def _encode_layout(self, fig: go.Figure) -> str:
+        layout = fig.layout.to_plotly_json()
+
+        if self.stamp_title:
+            timestamp = int(time.time())
+            title = layout.get("title")
+            text = title.get("text") if isinstance(title, dict) else title
+            title = dict(title) if isinstance(title, dict) else {}
+            title["text"] = f"{text} ({timestamp})" if text else f"({timestamp})"
+            layout["title"] = title
+
+        return _json_member("layout", go.Figure(layout=layout).to_dict()["layout"])
+
+    @profiled
+    def save(self, fig: go.Figure) -> Dict[str, Any]:
+        """
+        fig を savepath に書き出す。
+
+        Returns
+        -------
+        dict
+            {"path": 出力パス, "reused": 使い回したトレース数, "encoded": JSON にし直したトレース数}
+        """
+        head, middle, tail = self._html_shell()
+        traces, encoded = self._encode_traces(fig)
+        layout = self._encode_layout(fig)
+
+        dirpath = os.path.dirname(self.savepath)
+        if dirpath and not os.path.exists(dirpath):
+            os.makedirs(dirpath, exist_ok=True)
+
+        tmp = f"{self.savepath}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(head)
+            f.write("[")
+            for i, blob in enumerate(traces):
+                if i:
+                    f.write(", ")
+                f.write(blob)
+            f.write("]")
+            f.write(middle)
+            f.write(layout)
+            f.write(tail)
+        os.replace(tmp, self.savepath)
+        record_io(written=os.path.getsize(self.savepath))
+
+        return {"path": self.savepath, "reused": len(traces) - encoded, "encoded": encoded}
+
+    def reset(self) -> None:
+        """保持しているトレースの JSON を捨てる（次の save ですべて作り直す）。"""
+        self._blobs = []
+
+
+# バンドル HTML の 2 行目に置く固定長ヘッダ。索引 JSON の位置 (バイトオフセット, バイト長) を持つ
+_BUNDLE_HEADER = "<!-- molib-bundle v1 index={offset:016d}:{length:016d} -->\n"
+_BUNDLE_HEADER_RE = re.compile(rb"<!-- molib-bundle v(\d+) index=(\d{16}):(\d{16}) -->")
+_BUNDLE_HEAD_BYTES = 256
+
+
+@profiled
+def save_figs_as_bundle(
+    figs: List[go.Figure] | Dict[str, go.Figure],
+    savepath: str = "notebook/figs/bundle.html",
+    *,
+    include_plotlyjs: bool | str = "inline",
+    config: Dict[str, Any] | None = None,
+) -> str:
+    """
+    複数の図を 1 つの HTML にまとめて保存する関数。plotly.js は 1 回だけ埋め込む。
+
+    各図の位置（バイトオフセットと長さ）を索引 JSON としてファイル末尾に置き、
+    その位置を先頭の固定長ヘッダに書くので、load_bundle_figure は
+    ファイル全体を読まずに N 番目の図だけを読み出せる。
+    ブラウザで開くと、普通の HTML としてすべての図が表示される。
+
+    Save many figures into one HTML file that includes plotly.js only once.
+    A byte-offset index allows reading a single figure back without parsing the whole file.
+
+    Parameters
+    ----------
+    figs : 
+        List of figures, or dict of {name: figure}
+    savepath : 
+        Name of output file path
+    include_plotlyjs : 
+        "inline", "cdn" or False (same as pio.to_html)
+    config : 
+        Plotly config for all figures
+
+    Returns
+    -------
+    str : 
+        Output file path to the saved HTML file.
+    """
+    import json
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+    _ensure_renderer()
+
+    items = list(figs.items()) if isinstance(figs, dict) else [(str(i), fig) for i, fig in enumerate(figs)]
+
+    if include_plotlyjs == "inline":
+        plotlyjs = f'<script type="text/javascript">{get_plotlyjs()}</script>'
+    elif include_plotlyjs == "cdn":
+        plotlyjs = f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js" charset="utf-8"></script>'
+    elif include_plotlyjs is False:
+        plotlyjs = ""
+    else:
+        raise ValueError(f"unknown include_plotlyjs: {include_plotlyjs!r}")
+
+    dirpath = os.path.dirname(savepath)
+    if dirpath and not os.path.exists(dirpath):
+        os.makedirs(dirpath, exist_ok=True)
+
+    index = []
+    with open(savepath, "wb") as f:
+        f.write(b"<!DOCTYPE html>\n")
+        header_pos = f.tell()
+        f.write(_BUNDLE_HEADER.format(offset=0, length=0).encode("ascii"))
+        f.write(f'<html>\n<head><meta charset="utf-8" />{plotlyjs}</head>\n<body>\n'.encode("utf-8"))
+
+        for i, (name, fig) in enumerate(items):
+            div_id = f"molib-bundle-{i}"
+            fragment = pio.to_html(
+                fig, include_plotlyjs=False, full_html=False, div_id=div_id, config=config
+            ).encode("utf-8")
+
+            offset = f.tell()
+            f.write(fragment)
+            f.write(b"\n")
+            index.append({"name": name, "div_id": div_id, "offset": offset, "length": len(fragment)})
+
+        payload = json.dumps({"version": 1, "figures": index}, ensure_ascii=False).encode("utf-8")
+        f.write(b'<script type="application/json" id="molib-bundle-index">')
+        index_offset = f.tell()
+        f.write(payload)
+        f.write(b"</script>\n</body>\n</html>\n")
+        written = f.tell()
+
+        f.seek(header_pos)
+        f.write(_BUNDLE_HEADER.format(offset=index_offset, length=len(payload)).encode("ascii"))
+
+    record_io(written=written)
+
+    return savepath
+
+
+def _read_at(f, offset: int, length: int) -> bytes:
+    f.seek(offset)
+    data = f.read(length)
+    record_io(read=len(data))
+    return data
+
+
+@profiled
+def read_bundle_index(input_path: str = "notebook/figs/bundle.html") -> List[Dict[str, Any]]:
+    """
+    save_figs_as_bundle で保存した HTML の索引（図ごとの name, div_id, offset, length）を返す。
+    先頭のヘッダと索引の部分だけを読む。
+
+    Read the figure index of a bundle written by save_figs_as_bundle.
+    """
+    import json
+
+    with open(input_path, "rb") as f:
+        m = _BUNDLE_HEADER_RE.search(_read_at(f, 0, _BUNDLE_HEAD_BYTES))
+        if m is None:
+            raise ValueError(f"not a figure bundle: {input_path}")
+        if int(m.group(1)) != 1:
+            raise ValueError(f"unsupported bundle version: {int(m.group(1))}")
+
+        index = json.loads(_read_at(f, int(m.group(2)), int(m.group(3))))
+
+    return index["figures"]
+
+
+@profiled
+def load_bundle_figure(
+    input_path: str = "notebook/figs/bundle.html",
+    key: int | str = 0,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    バンドル HTML から 1 つの図だけを読み出す関数。
+    索引からその図の位置を調べ、その部分だけを読んでパースする（ファイルの大きさによらない）。
+
+    Load one figure from a bundle. Only the header, the index and that figure's block are read.
+
+    Parameters
+    ----------
+    input_path : 
+        Input file path
+    key : 
+        Figure number (int) or name (str) given to save_figs_as_bundle
+
+    Returns
+    -------
+    data, layout: 
+       get_plotly_values_json と同じ（decode_typed_arrays でデコードできる）
+    """
+    figures = read_bundle_index(input_path)
+
+    if isinstance(key, str):
+        matches = [fig for fig in figures if fig["name"] == key]
+        if not matches:
+            raise KeyError(key)
+        entry = matches[0]
+    else:
+        entry = figures[key]
+
+    with open(input_path, "rb") as f:
+        fragment = _read_at(f, entry["offset"], entry["length"]).decode("utf-8")
+
+    return parse_plotly_script(fragment)
+
+
+async def load_bundle_figure_async(
+    input_path: str = "notebook/figs/bundle.html",
+    key: int | str = 0,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    load_bundle_figure の async 版。ファイル読み込みとパースをスレッドプールで行う。
+    """
+    return await asyncio.to_thread(load_bundle_figure, input_path, key)
+
+
+@profiled
 def get_plotly_values_json(text):
     """
     String型で格納されているHTMLテキストからデータの値をjson形式でパースする関数
@@ -113,6 +523,7 @@ def get_plotly_values_json(text):
     return parse_plotly_script(script_js)
 
 
+@profiled
 def parse_plotly_script(script_js: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     <script> 内のテキスト（Plotly.newPlot(...) を含む）から data(list), layout(dict) を返す。
@@ -134,6 +545,19 @@ def parse_plotly_script(script_js: str) -> Tuple[List[Dict[str, Any]], Dict[str,
         raise ValueError("Plotly.newPlot(...) not found")
     pos = m.end()
 
+    # Plotly が書き出した引数は正しい JSON なので、標準の json で先頭から直接読む
+    # （括弧の対応を 1 文字ずつ調べる必要も json5 も不要で、桁違いに速い）
+    import json
+
+    decoder = json.JSONDecoder()
+    try:
+        data, pos_after_data = decoder.raw_decode(script_js, script_js.index('[', pos))
+        layout, _ = decoder.raw_decode(script_js, script_js.index('{', pos_after_data))
+        return data, layout
+    except ValueError:
+        pass
+
+    # 手で編集されたなど JSON として読めないときは json5 で読む
     data_json, pos_after_data = extract_bracketed(script_js, pos, '[', ']')
     layout_json, _ = extract_bracketed(script_js, pos_after_data, '{', '}')
 
@@ -196,6 +620,7 @@ def extract_bracketed(s: str, start_pos: int, open_ch: str, close_ch: str) -> Tu
     raise ValueError(f"no matching '{close_ch}' for '{open_ch}'")
 
 
+@profiled
 def decode_typed_arrays(obj:Tuple[List[Dict[str, Any]], Dict[str, Any]]):
     """
     Plotlyで保存したHTMLから数値データを取得する関数。
@@ -422,11 +847,47 @@ def find_right_regex(text: str, pattern: str, from_pos: int, *, flags: int=0, in
 
     return (max(0, start) + m.start()) if m else -1
 
+def _grid_edges_and_index(centers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    格子点の座標列から、ビンのエッジ（隣り合う中心の中点）と各点のビン番号を返す。
+
+    重複除去は pd.unique（ハッシュ、O(n)）で行い、ソートは重複除去後の値だけに行う。
+    等間隔の格子なら rint((c - c0) / step) でビン番号を求め、
+    不等間隔のときだけ searchsorted にフォールバックする。
+    """
+    import pandas as pd
+
+    c = np.sort(pd.unique(centers))
+
+    if len(c) == 1:
+        edges = np.array([c[0] - 0.5, c[0] + 0.5])
+        return edges, np.zeros(len(centers), dtype=np.intp)
+
+    mid = 0.5 * (c[:-1] + c[1:])
+    left  = c[0]  - (c[1]  - c[0])  / 2
+    right = c[-1] + (c[-1] - c[-2]) / 2
+    edges = np.r_[left, mid, right]
+
+    d = np.diff(c)
+    step = (c[-1] - c[0]) / (len(c) - 1)
+    if np.abs(d - step).max() <= 1e-6 * step:
+        index = np.rint((centers - c[0]) / step).astype(np.intp)
+    else:
+        index = np.searchsorted(c, centers)
+
+    return edges, index
+
+
+@profiled
 def get_np_histogram2d(
     data: list = None,
     bins: list = None,
     xrange: list = None,
-    yrange: list = None
+    yrange: list = None,
+    cache: bool = False,
+    chunk_size: int | None = None,
+    columns: list | None = None,
+    filters: Any = None,
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     2Dヒストの生カウントとエッジを返す（plotly では z=counts.T を使う想定）
@@ -435,12 +896,28 @@ def get_np_histogram2d(
     ----------
     data : 
         2 or 3 dimansional data list [x[1,2,1,...,1], y[3,2,1,...,3], z[3,2,1,...,3]]
+        3 要素のときは格子点 (x, y) と値 z とみなし、格子の各点をそのまま 1 ビンにする
+        （bins / xrange / yrange は使わない）
+        .npy のパス（列として開く）や、各列に .npy のパス・np.memmap も渡せる。
+        pyarrow の Table や Parquet のパスも渡せる（columns の列だけを読む。要 pyarrow）。
+        2 列なら histogram.histogram2d_arrow でバッチごとに読み、メモリ使用量は一定
     bins : 
         bin information [bin number for x, bin number for y]
     xrange : 
         effective range for x axis [min, max]
     yrange : 
         effective range for y axis [min, max]
+    cache : 
+        True のとき histogram.cached_histogram2d を使い、同じデータ・条件の結果を再利用する
+    chunk_size : 
+        指定すると 2 要素のデータを chunk_size 行ずつ分割して積算する（histogram.histogram2d_chunked）。
+        列に np.memmap などの遅延読み込みの列が含まれるときは指定しなくても分割する
+    columns : 
+        data がファイルや Arrow のときに使う列（名前または番号）。[x, y] または [x, y, z]
+        Arrow / Parquet では必須
+    filters : 
+        data が Arrow / Parquet のときの行の絞り込み（pyarrow.compute.Expression または
+        [("run", "==", 3)] 形式のリスト）。行グループ単位で読み飛ばされる
 
     Returns
     -------
@@ -449,6 +926,26 @@ def get_np_histogram2d(
     """
     if data is None:
         return None
+
+    if not isinstance(data, (list, tuple)) or any(isinstance(c, (str, os.PathLike)) for c in data):
+        from .histogram import histogram2d_arrow, is_arrow_source, resolve_columns
+
+        # Arrow の 2 列は読み込まずにバッチごとに積算する（キャッシュは列の内容が要るので読み込む）
+        if is_arrow_source(data) and not cache and columns is not None and len(columns) == 2:
+            return histogram2d_arrow(data, columns, bins, xrange, yrange, filters, chunk_size)
+
+        data = resolve_columns(data, columns, filters)
+
+    if cache:
+        from .histogram import cached_histogram2d
+
+        return cached_histogram2d(data, bins, xrange, yrange, chunk_size=chunk_size)
+
+    if len(data) == 2:
+        from .histogram import histogram2d_chunked, is_out_of_core
+
+        if chunk_size is not None or is_out_of_core(data):
+            return histogram2d_chunked(data, bins, xrange, yrange, chunk_size)
     
     if xrange is None:
         xrange = []
@@ -461,6 +958,8 @@ def get_np_histogram2d(
 
     if len(data) == 2:
 
+        import pandas as pd
+
         x = pd.to_numeric(x, errors='coerce')
         y = pd.to_numeric(y, errors='coerce')
 
@@ -474,23 +973,24 @@ def get_np_histogram2d(
             counts, xedges, yedges = np.histogram2d(x_clean, y_clean, bins=bins) 
 
     else:
+        w = np.asarray(data[2], dtype=float)
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
 
-        def centers_to_edges_from_centers(centers: np.ndarray) -> np.ndarray:
-            c = np.sort(np.unique(centers))       # ★ 重複除去が必須
-            mid = 0.5 * (c[:-1] + c[1:])
-            left  = c[0]  - (c[1]  - c[0])  / 2
-            right = c[-1] + (c[-1] - c[-2]) / 2
-            return np.r_[left, mid, right]
-        
-        w = data[2]
+        mask = np.isfinite(x) & np.isfinite(y)
+        if not mask.all():
+            x, y, w = x[mask], y[mask], w[mask]
 
-        xedges = centers_to_edges_from_centers(x)
-        yedges = centers_to_edges_from_centers(y)
+        xedges, ix = _grid_edges_and_index(x)
+        yedges, iy = _grid_edges_and_index(y)
 
-        counts, xedges, yedges = np.histogram2d(x, y, bins=[xedges, yedges], weights=w)
+        # 格子データは 1 点 1 ビンなので、histogram2d で再ビニングせずに重みを直接積算する
+        nx, ny = len(xedges) - 1, len(yedges) - 1
+        counts = np.bincount(ix * ny + iy, weights=w, minlength=nx * ny).reshape(nx, ny)
 
     return counts, xedges, yedges
 
+@profiled
 def slice_1d_from_2dhist(
     counts: np.ndarray,
     xedges: np.ndarray,
@@ -600,6 +1100,7 @@ def slice_1d_from_2dhist(
     }
 
 
+@profiled
 def get_slice_array(
     data: list = None,
     bins: list = None, 
@@ -608,7 +1109,8 @@ def get_slice_array(
     slice_axis: str = "x", 
     bin_span: int = 1,
     normalize: bool = False,
-    histo_skip: bool = False
+    histo_skip: bool = False,
+    cache: bool = False,
 ) -> list:
     """
     二次元ヒストグラムから任意の便数でまとめた頻度を一次元ヒストグラムのリストとして取得する。
@@ -633,6 +1135,9 @@ def get_slice_array(
         Normarize option
     histo_skip : 
         Flag to skip numpy.histogram2d
+    cache : 
+        2D ヒストグラムをキャッシュから再利用する（histogram.cached_histogram2d）。
+        bin_span や slice_axis だけを変えた再実行では np.histogram2d をやり直さない
 
     Returns
     -------
@@ -640,7 +1145,7 @@ def get_slice_array(
         List of one dimensional histogram information 
     """  
     histo_array = []
-    data2d = get_np_histogram2d(data, bins, xrange, yrange) if histo_skip is False else data
+    data2d = get_np_histogram2d(data, bins, xrange, yrange, cache=cache) if histo_skip is False else data
     max_loop = len(data2d[0][0])//bin_span if slice_axis == 'y' else len(data2d[0])//bin_span
 
     for i in range(max_loop):
@@ -657,6 +1162,7 @@ def get_slice_array(
     return histo_array
 
 
+@profiled
 def add_sub_plot(
     fig:go.Figure,
     irow:int = 1,
@@ -707,6 +1213,8 @@ def add_sub_plot(
     **kwargs : 
         dictionary to store additional arguments for func
     """
+    _ensure_renderer()
+
     if axes_title is None:
         axes_title = ['x', 'y']
 
@@ -765,6 +1273,7 @@ def add_sub_plot(
         )
 
 
+@profiled
 def go_Histogram(
     fig:go.Figure, 
     irow:int,
@@ -795,29 +1304,67 @@ def go_Histogram(
         Valid range
     dataneme :
         Data object label name
+
+    data[0] が np.memmap（または .npy のパス）のときは、データをブラウザに送らず
+    histogram.histogram1d_chunked で分割して数えた結果を go.Bar で描く。
+    ビンはどちらの場合も histogram.histogram1d_edges で決めるので、同じデータなら同じビンになる
+    （xrange なしは np.histogram と同じ min/max の bins 等分、xrange=[start, end, size] は plotly の xbins と同じ）。
+
+    Returns
+    -------
+    edges :
+        使ったビンのエッジ。数値以外のデータ（カテゴリ）では plotly に任せるので None
     """
     bins = [200] if bins is None else bins
 
-    if xrange is None:
+    col = data[0]
+    if isinstance(col, (str, os.PathLike)):
+        from .histogram import load_columns
+
+        col = load_columns(col)[0]
+
+    from .histogram import histogram1d_chunked, histogram1d_edges, is_out_of_core
+
+    if is_out_of_core([col]):
+        edges = histogram1d_edges(col, bins[0], xrange)
+        counts, _ = histogram1d_chunked(col, edges)
+
         fig.add_trace(
-            go.Histogram(x=data[0],nbinsx=bins[0],name=dataname),
+            go.Bar(
+                x=0.5 * (edges[:-1] + edges[1:]),
+                y=counts,
+                width=np.diff(edges),
+                marker_line_width=0,
+                name=dataname,
+            ),
             row=irow, col=icol
         )
-    else:
+        return edges
+
+    if xrange is None and np.asarray(col).dtype.kind not in "iufb":
         fig.add_trace(
-            go.Histogram(
-                x=data[0],
-                xbins=dict(
-                    start=xrange[0],   
-                    end=xrange[1], 
-                    size=xrange[2] 
-                ),
-                name=dataname
-            ),
+            go.Histogram(x=data[0],nbinsx=bins[0],name=dataname),
             row=irow, col=icol
         )
+        return None
 
+    edges = histogram1d_edges(col, bins[0], xrange)
+    fig.add_trace(
+        go.Histogram(
+            x=data[0],
+            xbins=dict(
+                start=edges[0],
+                end=edges[-1],
+                size=edges[1] - edges[0]
+            ),
+            name=dataname
+        ),
+        row=irow, col=icol
+    )
+    return edges
 
+
+@profiled
 def go_Heatmap(
     fig:go.Figure, 
     irow:int,
@@ -829,7 +1376,8 @@ def go_Heatmap(
     yrange:list[int,int] | None = None,
     debug:bool = False,
     dataname:str | None = None,
-    colormap:str = "Turbo"
+    colormap:str = "Turbo",
+    cache:bool = False,
 ):
     """
     plotly.graph_objectsのHistogramを使って図を追加する関数
@@ -860,10 +1408,12 @@ def go_Heatmap(
         Data object label name
     colormap :
         colomap name
+    cache :
+        2D ヒストグラムをキャッシュから再利用する（histogram.cached_histogram2d）
     """
     bins = [200, 200] if bins is None else bins
 
-    counts, xedges, yedges = get_np_histogram2d(data=data, bins=bins, xrange=xrange, yrange=yrange)
+    counts, xedges, yedges = get_np_histogram2d(data=data, bins=bins, xrange=xrange, yrange=yrange, cache=cache)
     
     if logz_option:
         counts = np.log10(counts + 1)
@@ -916,6 +1466,7 @@ def go_Heatmap(
         print(f"[debug] Entries {total_count}, Max value {max_val} at ({x_at_max},{y_at_max}), Min value {min_val} at ({x_at_min},{y_at_min})")
 
 
+@profiled
 def go_Scatter(
     fig:go.Figure, 
     irow:int,
@@ -1058,6 +1609,7 @@ def go_Scatter(
         )
         
 
+@profiled
 def go_Bar(
     fig:go.Figure, 
     irow:int,
@@ -1094,6 +1646,7 @@ def go_Bar(
     )
 
 
+@profiled
 def align_colorbar(fig, thickness=20, thicknessmode="pixels"):
     """
     二次元ヒストグラムのカラーバーを配置する
@@ -0,0 +1,258 @@
+"""
+marimo_lib の公開関数の実行時間・I/O バイト数・ピークメモリを記録する計測レイヤー。
+
+既定では無効で、無効のときのオーバーヘッドはフラグ 1 回の確認だけ。
+環境変数 MARIMO_LIB_PROFILE=1 を設定して起動するか、
+profile() コンテキストマネージャ / enable() で有効にする。
+
+例:
+    from marimo_lib.util import profiling
+
+    with profiling.profile() as prof:
+        fig_path = molib.plot.save_fig_as_html(fig)
+        html = molib.image.get_image_html("figs/logo.png")
+
+    prof.report()          # 関数ごとに集計した pandas.DataFrame
+    prof.to_marimo()       # marimo の表として表示
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_enabled = False
+_records: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_local = threading.local()
+_started_tracemalloc = False
+
+
+class _Frame:
+    __slots__ = ("name", "start", "mem_start", "peak", "bytes_read", "bytes_written")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = time.perf_counter()
+        self.mem_start = 0
+        self.peak = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+
+def _stack() -> List[_Frame]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(trace_memory: bool = True) -> None:
+    """
+    計測を有効にする。trace_memory=True ならピークメモリ計測のため tracemalloc も開始する
+    （tracemalloc 自体が処理を数割遅くする点に注意）。
+    """
+    global _enabled, _started_tracemalloc
+
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+    _enabled = True
+
+
+def disable() -> None:
+    """計測を無効にする。enable() で開始した tracemalloc も止める。"""
+    global _enabled
+
+    _enabled = False
+    _stop_tracemalloc()
+
+
+def _stop_tracemalloc() -> None:
+    global _started_tracemalloc
+
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def reset() -> None:
+    """記録を消去する。"""
+    with _lock:
+        _records.clear()
+
+
+def records() -> List[Dict[str, Any]]:
+    """1 呼び出し 1 行の生の記録（dict のリスト）を返す。"""
+    with _lock:
+        return list(_records)
+
+
+def record_io(read: int = 0, written: int = 0) -> None:
+    """
+    実行中の計測対象関数に I/O バイト数を加算する。
+    ファイルを読み書きする関数の中から呼ぶ。計測が無効なら何もしない。
+    """
+    if not _enabled:
+        return
+
+    for frame in _stack():
+        frame.bytes_read += read
+        frame.bytes_written += written
+
+
+def profiled(func: F) -> F:
+    """
+    関数を計測対象にするデコレータ。
+
+    再帰呼び出し（decode_typed_arrays など）は一番外側の呼び出しだけを記録する。
+    ネストした計測対象関数のピークメモリ・I/O は外側の関数にも含まれる。
+    """
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not _enabled:
+            return func(*args, **kwargs)
+
+        stack = _stack()
+        if any(frame.name == name for frame in stack):
+            return func(*args, **kwargs)
+
+        tracing = tracemalloc.is_tracing()
+        frame = _Frame(name)
+
+        if tracing:
+            if stack:
+                # 外側の関数のここまでのピークを退避してからリセットする
+                stack[-1].peak = max(stack[-1].peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            frame.mem_start = tracemalloc.get_traced_memory()[0]
+
+        stack.append(frame)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stack.pop()
+            wall = time.perf_counter() - frame.start
+
+            peak = 0
+            if tracing and tracemalloc.is_tracing():
+                frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+                peak = max(0, frame.peak - frame.mem_start)
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, frame.peak)
+
+            with _lock:
+                _records.append({
+                    "function": name,
+                    "wall_s": wall,
+                    "bytes_read": frame.bytes_read,
+                    "bytes_written": frame.bytes_written,
+                    "peak_alloc": peak,
+                    "timestamp": time.time(),
+                })
+
+    return wrapper  # type: ignore[return-value]
+
+
+_COLUMNS = ["function", "wall_s", "bytes_read", "bytes_written", "peak_alloc", "timestamp"]
+
+
+def _table(rows: List[Dict[str, Any]], raw: bool):
+    import pandas as pd
+
+    df = pd.DataFrame(rows, columns=_COLUMNS)
+    if raw:
+        return df
+
+    return (
+        df.groupby("function")
+        .agg(
+            calls=("wall_s", "size"),
+            total_s=("wall_s", "sum"),
+            mean_s=("wall_s", "mean"),
+            max_s=("wall_s", "max"),
+            bytes_read=("bytes_read", "sum"),
+            bytes_written=("bytes_written", "sum"),
+            peak_alloc=("peak_alloc", "max"),
+        )
+        .sort_values("total_s", ascending=False)
+        .reset_index()
+    )
+
+
+def report(raw: bool = False):
+    """
+    記録を pandas.DataFrame にして返す。
+
+    raw=False なら関数ごとに集計（呼び出し回数、合計/平均/最大時間、I/O 合計、最大ピークメモリ）
+    し、合計時間の降順に並べる。raw=True なら 1 呼び出し 1 行。
+    """
+    return _table(records(), raw)
+
+
+def to_marimo(raw: bool = False):
+    """report() の結果を marimo の表 (mo.ui.table) にして返す。"""
+    import marimo as mo
+
+    return mo.ui.table(report(raw=raw), selection=None)
+
+
+class Profile:
+    """profile() が返すハンドル。ブロック内で記録された分だけを扱う。"""
+
+    def __init__(self, first: int) -> None:
+        self._first = first
+        self._last: Optional[int] = None
+
+    def records(self) -> List[Dict[str, Any]]:
+        with _lock:
+            return list(_records[self._first:self._last])
+
+    def report(self, raw: bool = False):
+        return _table(self.records(), raw)
+
+    def to_marimo(self, raw: bool = False):
+        import marimo as mo
+
+        return mo.ui.table(self.report(raw=raw), selection=None)
+
+
+@contextlib.contextmanager
+def profile(trace_memory: bool = True) -> Iterator[Profile]:
+    """
+    ブロック内だけ計測を有効にする。抜けると元の状態（有効/無効）に戻る。
+    """
+    was_enabled = _enabled
+    was_tracing = tracemalloc.is_tracing()
+
+    with _lock:
+        prof = Profile(len(_records))
+
+    enable(trace_memory=trace_memory)
+    try:
+        yield prof
+    finally:
+        with _lock:
+            prof._last = len(_records)
+
+        if not was_enabled:
+            disable()
+        elif not was_tracing and _started_tracemalloc:
+            # 計測自体は続けるが、このブロックで始めた tracemalloc は止める
+            _stop_tracemalloc()
+
+
+if os.environ.get("MARIMO_LIB_PROFILE", "").strip().lower() in ("1", "true", "yes", "on"):
+    enable()
@@ -1,94 +1,144 @@
+from __future__ import annotations
+
 import plotly
-import plotly.express as px
+import numpy as np
 import pandas as pd
+import asyncio
 import datetime as dt
 import plotly.graph_objects as go
-from typing import Any
+from typing import Any, Literal
+import functools
 import os 
+from .profiling import profiled, record_io
+
+_PALETTES: dict[str, np.ndarray] = {
+    "tokyo": np.array([
+        (255,  40,   0),
+        (250, 245,   0),
+        ( 53, 161, 107),
+        (  0,  65, 255),
+        (102, 204, 255),
+        (255, 153, 160),
+        (255, 153,   0),
+        (154,   0, 121),
+        (102,  51,   0),
+    ], dtype=np.uint8),
+    "facebook": np.array([
+        ( 76, 100,  21),
+        (207,  46, 146),
+        (242, 105,  57),
+        (255, 221, 131),
+    ], dtype=np.uint8),
+    "google": np.array([
+        ( 66, 133, 244),
+        ( 15, 158,  88),
+        ( 24, 180,   0),
+        (219,  68,  55),
+    ], dtype=np.uint8),
+    "pastel": np.array([
+        (255, 179, 186),
+        (255, 223, 186),
+        (255, 255, 186),
+        (186, 255, 201),
+        (186, 225, 255),
+    ], dtype=np.uint8),
+    "neon": np.array([
+        ( 57, 255,  20),
+        (255,  20, 147),
+        (  0, 255, 255),
+        (255, 255,   0),
+        (138,  43, 226),
+    ], dtype=np.uint8),
+    "tab10": np.array([
+        ( 31, 119, 180),
+        (255, 127,  14),
+        ( 44, 160,  44),
+        (214,  39,  40),
+        (148, 103, 189),
+        (140,  86,  75),
+        (227, 119, 194),
+        (127, 127, 127),
+        (188, 189,  34),
+        ( 23, 190, 207),
+    ], dtype=np.uint8),
+    "ud": np.array([
+        (  0,   0,   0),
+        (230, 159,   0),
+        ( 86, 180, 233),
+        (  0, 158, 115),
+        (240, 228,  66),
+        (  0, 114, 178),
+        (213,  94,   0),
+        (204, 121, 167),
+    ], dtype=np.uint8),
+}
+
+
+def register_palette(label: str, colors: Any) -> None:
+    """
+    パレットを登録する（同名があれば上書き）。colors は (r, g, b) の並び。
+    """
+    rgb = np.asarray(colors, dtype=np.uint8)
+    if rgb.ndim != 2 or rgb.shape[1] != 3:
+        raise ValueError("colors must be a sequence of (r, g, b)")
 
+    _PALETTES[label] = rgb
+    _format_palette.cache_clear()
+
+
+@functools.lru_cache(maxsize=256)
+def _format_palette(label: str, alpha: float) -> np.ndarray:
+    """(label, alpha) ごとに整形済みの 'rgba(...)' 文字列配列を作ってキャッシュする。"""
+    rgb = _PALETTES.get(label)
+    if rgb is None:
+        colors = np.empty(0, dtype=object)
+    else:
+        colors = np.array([f"rgba({r:3d}, {g:3d}, {b:3d}, {alpha})" for r, g, b in rgb.tolist()], dtype=object)
+
+    colors.flags.writeable = False
+    return colors
+
+
+@profiled
 def get_color_list(label: str = "tokyo", alpha: float = 0.6):
-    color_list = []
-
-    if label == "tokyo":
-        color_list = [
-            f"rgba(255,  40,   0, {alpha})",
-            f"rgba(250, 245,   0, {alpha})",
-            f"rgba( 53, 161, 107, {alpha})",
-            f"rgba(  0,  65, 255, {alpha})",
-            f"rgba(102, 204, 255, {alpha})",
-            f"rgba(255, 153, 160, {alpha})",
-            f"rgba(255, 153,   0, {alpha})",
-            f"rgba(154,   0, 121, {alpha})",
-            f"rgba(102,  51,   0, {alpha})",
-        ]
-
-    elif label == "facebook":
-        color_list = [
-            f"rgba( 76, 100,  21, {alpha})",
-            f"rgba(207,  46, 146, {alpha})",
-            f"rgba(242, 105,  57, {alpha})",
-            f"rgba(255, 221, 131, {alpha})",
-        ]
-
-    elif label == "google":
-        color_list = [
-            f"rgba( 66, 133, 244, {alpha})",
-            f"rgba( 15, 158,  88, {alpha})",
-            f"rgba( 24, 180,   0, {alpha})",
-            f"rgba(219,  68,  55, {alpha})",
-        ]
-
-    elif label == "pastel":
-        color_list = [
-            f"rgba(255, 179, 186, {alpha})",
-            f"rgba(255, 223, 186, {alpha})",
-            f"rgba(255, 255, 186, {alpha})",
-            f"rgba(186, 255, 201, {alpha})",
-            f"rgba(186, 225, 255, {alpha})", 
-        ]
-
-    elif label == "neon":
-        color_list = [
-            f"rgba( 57, 255,  20, {alpha})",
-            f"rgba(255,  20, 147, {alpha})",
-            f"rgba(  0, 255, 255, {alpha})",
-            f"rgba(255, 255,   0, {alpha})",
-            f"rgba(138,  43, 226, {alpha})",
-        ]
-
-    elif label == "tab10":
-        color_list = [
-            f"rgba( 31, 119, 180, {alpha})",
-            f"rgba(255, 127,  14, {alpha})",
-            f"rgba( 44, 160,  44, {alpha})",
-            f"rgba(214,  39,  40, {alpha})",
-            f"rgba(148, 103, 189, {alpha})",
-            f"rgba(140,  86,  75, {alpha})",
-            f"rgba(227, 119, 194, {alpha})",
-            f"rgba(127, 127, 127, {alpha})",
-            f"rgba(188, 189,  34, {alpha})",
-            f"rgba( 23, 190, 207, {alpha})",
-        ]
-
-    elif label == "ud":
-        color_list = [
-            f"rgba(  0,   0,   0, {alpha})",
-            f"rgba(230, 159,   0, {alpha})",
-            f"rgba( 86, 180, 233, {alpha})",
-            f"rgba(  0, 158, 115, {alpha})",
-            f"rgba(240, 228,  66, {alpha})",
-            f"rgba(  0, 114, 178, {alpha})",
-            f"rgba(213,  94,   0, {alpha})",
-            f"rgba(204, 121, 167, {alpha})",
-        ]
-
-    return color_list
+    return _format_palette(label, alpha).tolist()
+
+
+@profiled
+def map_colors(values: Any, label: str = "tab10", alpha: float = 0.6) -> np.ndarray:
+    """
+    カテゴリ列の各要素に色を割り当てた配列を返す。
+    値の初出順にパレットを巡回して割り当てる（パレットより値が多ければ繰り返す）。
+
+    例:
+        df["fill"] = map_colors(df["resource"], "tab10", 0.3)
+    """
+    colors = _format_palette(label, alpha)
+    if len(colors) == 0:
+        raise ValueError(f"unknown palette: {label!r}")
+
+    codes, _ = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    return colors[codes % len(colors)]
+
+
+@profiled
+def get_color_map(values: Any, label: str = "tab10", alpha: float = 0.6) -> dict[Any, str]:
+    """
+    カテゴリ値 -> 色 の dict を返す（color_discrete_map / edge_color_map 用）。
+    """
+    colors = _format_palette(label, alpha)
+    if len(colors) == 0:
+        raise ValueError(f"unknown palette: {label!r}")
+
+    uniques = pd.unique(pd.Series(values))
+    return dict(zip(uniques.tolist(), colors[np.arange(len(uniques)) % len(colors)].tolist()))
 
 
 def init_schedule():
     return pd.DataFrame(columns=["task", "start", "end", "resource", "name"])
 
 
+@profiled
 def add_periodic_task(
     data: pd.DataFrame | None,
     *,
@@ -154,6 +204,7 @@ def add_periodic_task(
         add_task(data=data, **row_kwargs,)
 
 
+@profiled
 def add_task(
     data: pd.DataFrame | None = None,
     *,
@@ -197,6 +248,426 @@ def add_task(
         data.loc[len(data)] = new_row
 
 
+def _to_ms(values: Any) -> np.ndarray:
+    """日時の列/スカラーを UNIX ミリ秒(int64) の配列にする。"""
+    return pd.to_datetime(np.atleast_1d(values)).to_numpy("datetime64[ms]").astype(np.int64)
+
+
+class TimelineIndex:
+    """
+    スケジュールの各行を開始時刻でソートして持つ区間インデックス。
+
+    ソート済みの開始時刻と、その順での終了時刻の累積最大値を持つので、
+    ある時間範囲に重なる行を二分探索＋ベクトル演算で取り出せる。
+    スケジュールが変わらない間はインスタンスを使い回す想定。
+
+    例:
+        index = TimelineIndex(df)
+        rows = index.query("2025-11-01", "2025-11-08")
+        df.iloc[rows]
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        x_start: str = "start",
+        x_end: str = "end",
+    ) -> None:
+        starts = _to_ms(data[x_start]) if len(data) else np.empty(0, dtype=np.int64)
+        ends = _to_ms(data[x_end]) if len(data) else np.empty(0, dtype=np.int64)
+
+        self._build(starts, ends)
+
+    @classmethod
+    def _from_keys(cls, starts: np.ndarray, ends: np.ndarray) -> "TimelineIndex":
+        """時刻以外の整数キー（ScheduleIndex の合成キーなど）から直接作る。"""
+        index = cls.__new__(cls)
+        index._build(starts, ends)
+        return index
+
+    def _build(self, starts: np.ndarray, ends: np.ndarray) -> None:
+        order = np.argsort(starts, kind="stable")
+
+        self.rows = order
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.max_ends = np.maximum.accumulate(self.ends) if len(order) else self.ends
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _query_keys(self, lo: int, hi: int, i_min: int = 0, i_max: int | None = None) -> np.ndarray:
+        """ソート順での位置 [i_min, i_max) のうち、キー区間 [lo, hi) に重なるものを返す。"""
+        # max_ends <= lo の区間より前は確実に重ならない
+        i0 = max(int(np.searchsorted(self.max_ends, lo, side="right")), i_min)
+        i1 = int(np.searchsorted(self.starts, hi, side="left"))
+        if i_max is not None:
+            i1 = min(i1, i_max)
+
+        if i1 <= i0:
+            return np.empty(0, dtype=np.intp)
+
+        return i0 + np.flatnonzero(self.ends[i0:i1] > lo)
+
+    def query(self, lo: Any, hi: Any) -> np.ndarray:
+        """
+        [lo, hi) に重なる行の位置(iloc)を昇順で返す。
+        """
+        pos = self._query_keys(_to_ms(lo)[0], _to_ms(hi)[0])
+        return np.sort(self.rows[pos])
+
+
+class ScheduleIndex:
+    """
+    resource ごとの重なり検索・空き時間検索・ダブルブッキング検出を行うインデックス。
+
+    (resource, 開始時刻) の順に並べた合成キーの TimelineIndex を 1 つ持つ。
+    合成キーは resource の番号 * span + (時刻 - 最小時刻) で、
+    resource が変わるとキーが必ず大きくなるので、
+    終了時刻の累積最大値も resource ごとに自然にリセットされる。
+    構築は O(n log n)、検索は O(log n + 該当件数)。
+
+    例:
+        index = ScheduleIndex(df)
+        index.overlaps("2025-11-10 09:00", "2025-11-10 12:00", resource="TeamA")
+        index.free_slots("TeamA", "2025-11-10", "2025-11-17", min_duration="1h")
+        index.conflicts()
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        x_start: str = "start",
+        x_end: str = "end",
+        resource: str = "resource",
+    ) -> None:
+        starts = _to_ms(data[x_start]) if len(data) else np.empty(0, dtype=np.int64)
+        ends = _to_ms(data[x_end]) if len(data) else np.empty(0, dtype=np.int64)
+        codes, labels = pd.factorize(data[resource], use_na_sentinel=False)
+
+        self.labels = labels
+        self.timeline = TimelineIndex._from_keys(starts, ends)
+
+        self._t0 = int(min(starts.min(), ends.min())) if len(starts) else 0
+        self._span = int(max(starts.max(), ends.max())) - self._t0 + 2 if len(starts) else 1
+
+        codes = codes.astype(np.int64)
+        self._index = TimelineIndex._from_keys(
+            codes * self._span + (starts - self._t0),
+            codes * self._span + (ends - self._t0),
+        )
+        self._codes = codes[self._index.rows]
+        self._bounds = np.searchsorted(self._codes, np.arange(len(labels) + 1))
+
+    def __len__(self) -> int:
+        return len(self.timeline)
+
+    def _offset(self, t: Any) -> int:
+        return int(np.clip(_to_ms(t)[0] - self._t0, 0, self._span - 1))
+
+    def _code(self, resource: Any) -> int:
+        code = self.labels.get_indexer([resource])[0]
+        if code < 0:
+            raise KeyError(f"unknown resource: {resource!r}")
+        return int(code)
+
+    def overlaps(self, start: Any, end: Any, resource: Any | None = None) -> np.ndarray:
+        """
+        [start, end) に重なる行の位置(iloc)を昇順で返す。
+        resource を指定するとその resource の行だけに絞る。
+        """
+        if resource is None:
+            return self.timeline.query(start, end)
+
+        code = self._code(resource)
+        base = code * self._span
+        pos = self._index._query_keys(
+            base + self._offset(start),
+            base + self._offset(end),
+            self._bounds[code],
+            self._bounds[code + 1],
+        )
+        return np.sort(self._index.rows[pos])
+
+    def free_slots(
+        self,
+        resource: Any,
+        start: Any,
+        end: Any,
+        min_duration: str | pd.Timedelta | None = None,
+    ) -> pd.DataFrame:
+        """
+        resource のタスクが入っていない時間帯を [start, end) の範囲で返す。
+        min_duration より短い空きは除く。
+        """
+        lo = _to_ms(start)[0]
+        hi = _to_ms(end)[0]
+
+        code = self._code(resource)
+        base = code * self._span
+        pos = self._index._query_keys(
+            base + self._offset(start),
+            base + self._offset(end),
+            self._bounds[code],
+            self._bounds[code + 1],
+        )
+
+        # pos は開始時刻順なので、終了時刻の累積最大値で埋まっている範囲がわかる
+        busy_start = np.clip(self._index.starts[pos] - base + self._t0, lo, hi)
+        busy_end = np.clip(np.maximum.accumulate(self._index.ends[pos] - base + self._t0), lo, hi)
+
+        gap_start = np.r_[lo, busy_end]
+        gap_end = np.r_[busy_start, hi]
+
+        min_ms = 0 if min_duration is None else int(pd.Timedelta(min_duration) / pd.Timedelta(milliseconds=1))
+        keep = (gap_end > gap_start) & (gap_end - gap_start >= min_ms)
+
+        return pd.DataFrame({
+            "start": pd.to_datetime(gap_start[keep], unit="ms"),
+            "end": pd.to_datetime(gap_end[keep], unit="ms"),
+        })
+
+    def conflicts(self) -> pd.DataFrame:
+        """
+        同じ resource で時間が重なっているタスクの組をすべて返す。
+
+        Returns
+        -------
+        pd.DataFrame
+            resource, row_a, row_b（iloc、row_a が先に始まる方）,
+            overlap_start, overlap_end の列を持つ。
+        """
+        index = self._index
+
+        # 開始時刻順で自分より後にあり、自分の終了前に始まるものが重なり相手
+        stop = np.searchsorted(index.starts, index.ends, side="left")
+        n_pairs = np.maximum(stop - np.arange(len(index)) - 1, 0)
+
+        a = np.repeat(np.arange(len(index)), n_pairs)
+        first = np.cumsum(n_pairs) - n_pairs
+        b = a + 1 + (np.arange(len(a)) - np.repeat(first, n_pairs))
+
+        overlap_start = index.starts[b] - self._codes[b] * self._span + self._t0
+        overlap_end = np.minimum(index.ends[a], index.ends[b]) - self._codes[a] * self._span + self._t0
+
+        return pd.DataFrame({
+            "resource": np.asarray(self.labels, dtype=object)[self._codes[a]],
+            "row_a": index.rows[a],
+            "row_b": index.rows[b],
+            "overlap_start": pd.to_datetime(overlap_start, unit="ms"),
+            "overlap_end": pd.to_datetime(overlap_end, unit="ms"),
+        })
+
+
+def _timeline_traces_px(
+    data: pd.DataFrame,
+    timeline_info: dict[str, str],
+    color_discrete_map: dict[str, str] | None,
+    edge_color_map: dict[str, str],
+    taskname_info: dict,
+) -> list[go.Bar]:
+    """
+    plotly.express.timeline 経由でガントチャートのトレースを作る（従来の経路）。
+    """
+    import plotly.express as px
+
+    px_fig = px.timeline(
+        data,
+        x_start=timeline_info["x_start"],
+        x_end=timeline_info["x_end"],
+        y=timeline_info["y"],
+        color=timeline_info["color"],
+        text=timeline_info["text"],
+        color_discrete_map=color_discrete_map,
+    )
+
+    px_fig.for_each_trace(
+        lambda tr: tr.update(
+            marker_line_color=edge_color_map.get(tr.name, "black"),
+            marker_line_width=1,
+            opacity=0.6,
+            textposition="inside",
+            insidetextanchor="middle",
+            textfont=taskname_info,
+        )
+    )
+
+    return list(px_fig.data)
+
+
+def _timeline_traces_bar(
+    data: pd.DataFrame,
+    timeline_info: dict[str, str],
+    color_discrete_map: dict[str, str] | None,
+    edge_color_map: dict[str, str],
+    taskname_info: dict,
+) -> list[go.Bar]:
+    """
+    go.Bar を色グループごとに 1 本ずつ直接組み立てる。
+
+    px.timeline と同じく base に開始時刻、x に継続時間（ミリ秒）を入れた
+    横向きの棒にする。継続時間の計算は NumPy でまとめて行い、
+    枠線色・透明度・文字設定はトレース生成時に一度だけ与える。
+    """
+    if color_discrete_map is None:
+        color_discrete_map = {}
+
+    starts = pd.to_datetime(data[timeline_info["x_start"]]).to_numpy("datetime64[ms]")
+    ends = pd.to_datetime(data[timeline_info["x_end"]]).to_numpy("datetime64[ms]")
+    durations = (ends - starts).astype(np.int64)
+
+    y = data[timeline_info["y"]].to_numpy()
+    text = data[timeline_info["text"]].to_numpy()
+
+    # px と同じく初出順でグループ化し、マップに無い色は既定パレットから割り当てる
+    codes, groups = pd.factorize(data[timeline_info["color"]], use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+
+    from plotly.colors import qualitative
+
+    default_colors = qualitative.Plotly
+    n_default = len(color_discrete_map)
+    traces = []
+
+    for k, group in enumerate(groups):
+        rows = order[bounds[k]:bounds[k + 1]]
+
+        name = str(group)
+        color = color_discrete_map.get(group)
+        if color is None:
+            color = default_colors[n_default % len(default_colors)]
+            n_default += 1
+
+        traces.append(
+            go.Bar(
+                base=starts[rows],
+                x=durations[rows],
+                y=y[rows],
+                text=text[rows],
+                customdata=ends[rows],
+                orientation="h",
+                name=name,
+                legendgroup=name,
+                marker=dict(color=color, line=dict(color=edge_color_map.get(group, "black"), width=1)),
+                opacity=0.6,
+                textposition="inside",
+                insidetextanchor="middle",
+                textfont=taskname_info,
+                hovertemplate=(
+                    f"{timeline_info['y']}=%{{y}}<br>"
+                    f"{timeline_info['x_start']}=%{{base}}<br>"
+                    f"{timeline_info['x_end']}=%{{customdata}}<br>"
+                    f"{timeline_info['text']}=%{{text}}<extra></extra>"
+                ),
+            )
+        )
+
+    return traces
+
+
+_WINDOW_META = "marimo_lib.schedule.window"
+
+
+def _full_color_map(
+    data: pd.DataFrame,
+    color_col: str,
+    color_discrete_map: dict[str, str] | None,
+) -> dict[Any, str]:
+    """
+    データ全体の色グループに色を割り当てた dict を返す。
+    _timeline_traces_bar と同じ規則（マップに無いグループは初出順に既定パレット）で決めるので、
+    window なしで全体を描いたときと同じ色になる。表示範囲ごとに色が変わらないよう、
+    window 付きの描画ではこれを一度だけ作って使い回す。
+    """
+    from plotly.colors import qualitative
+
+    colors = dict(color_discrete_map) if color_discrete_map is not None else {}
+    n_default = len(colors)
+
+    for group in pd.unique(data[color_col]):
+        if group not in colors:
+            colors[group] = qualitative.Plotly[n_default % len(qualitative.Plotly)]
+            n_default += 1
+
+    return colors
+
+
+def _density_trace(
+    data: pd.DataFrame,
+    timeline_info: dict[str, str],
+    freq: str,
+) -> go.Bar:
+    """
+    表示範囲外のタスクを (y, 時間ビン) ごとに数え、1 本の薄い棒トレースにまとめる。
+    """
+    bin_ms = int(pd.Timedelta(freq) / pd.Timedelta(milliseconds=1))
+
+    starts = _to_ms(data[timeline_info["x_start"]]) if len(data) else np.empty(0, dtype=np.int64)
+    codes, labels = pd.factorize(data[timeline_info["y"]], use_na_sentinel=False)
+
+    bins = starts // bin_ms
+    keys, counts = np.unique(np.stack([codes, bins]), axis=1, return_counts=True)
+
+    opacity = 0.1 + 0.5 * counts / counts.max() if len(counts) else counts
+
+    return go.Bar(
+        base=(keys[1] * bin_ms).astype("datetime64[ms]"),
+        x=np.full(len(counts), bin_ms),
+        y=np.asarray(labels, dtype=object)[keys[0]],
+        customdata=counts,
+        orientation="h",
+        name="density",
+        marker=dict(color="gray", opacity=opacity, line=dict(width=0)),
+        hovertemplate="%{y}<br>%{base}<br>tasks=%{customdata}<extra></extra>",
+    )
+
+
+def _schedule_traces(
+    data: pd.DataFrame,
+    timeline_info: dict[str, str],
+    color_discrete_map: dict[str, str] | None,
+    edge_color_map: dict[str, str],
+    taskname_info: dict,
+    engine: str,
+    window: tuple[Any, Any] | None,
+    index: TimelineIndex | None,
+    density_freq: str | None,
+) -> list[go.Bar]:
+    if engine == "bar":
+        build_traces = _timeline_traces_bar
+    elif engine == "px":
+        build_traces = _timeline_traces_px
+    else:
+        raise ValueError(f"unknown engine: {engine!r}")
+
+    if window is None:
+        return build_traces(data, timeline_info, color_discrete_map, edge_color_map, taskname_info)
+
+    if index is None:
+        index = TimelineIndex(data, timeline_info["x_start"], timeline_info["x_end"])
+
+    rows = index.query(*window)
+    visible = data.iloc[rows]
+
+    traces = []
+    if len(visible):
+        traces = build_traces(visible, timeline_info, color_discrete_map, edge_color_map, taskname_info)
+
+    if density_freq is not None:
+        outside = np.ones(len(data), dtype=bool)
+        outside[rows] = False
+        if outside.any():
+            traces.insert(0, _density_trace(data.iloc[np.flatnonzero(outside)], timeline_info, density_freq))
+
+    # bind_schedule_window で差し替える対象の目印
+    for tr in traces:
+        tr.meta = _WINDOW_META
+
+    return traces
+
+
+@profiled
 def add_schedule(
     fig: plotly.graph_objects.Figure | None = None,
     data: pd.DataFrame | None = None,
@@ -208,7 +679,26 @@ def add_schedule(
     ref_time:dt.datetime = dt.datetime.now(),
     irow: int = 1,
     icol: int = 1,
+    engine: Literal["bar", "px"] = "bar",
+    window: tuple[Any, Any] | None = None,
+    index: TimelineIndex | None = None,
+    density_freq: str | None = "1D",
 ):
+    """
+    スケジュール(DataFrame)をガントチャートとして fig に追加する。
+
+    engine="bar" : 色グループごとに go.Bar を直接組み立てる（既定、大量タスク向け）
+    engine="px"  : plotly.express.timeline で一度図を作ってトレースを移す（従来どおり）
+
+    window=(開始, 終了) を渡すと、その範囲に重なるタスクだけを描画し、
+    範囲外のタスクは density_freq ごとの件数を表す薄い棒にまとめる
+    （density_freq=None なら範囲外は描かない）。
+    index に TimelineIndex を渡せば、再描画のたびにソートし直さずに済む。
+    """
+
+    from .plot import _ensure_renderer
+
+    _ensure_renderer()
 
     if fig is None:
         fig = go.Figure()
@@ -222,6 +712,10 @@ def add_schedule(
     if color_discrete_map is not None and not isinstance(color_discrete_map, dict):
         color_discrete_map = dict(color_discrete_map)
 
+    if window is not None:
+        # 表示範囲内の初出順で色が決まらないよう、全体で色を固定する
+        color_discrete_map = _full_color_map(data, timeline_info["color"], color_discrete_map)
+
     if edge_color_map is None:
         edge_color_map = {}
     elif not isinstance(edge_color_map, dict):
@@ -233,30 +727,33 @@ def add_schedule(
     if line_info is None:
         line_info = dict(color="red", width=2, dash="dot")
 
-    px_fig = px.timeline(
+    traces = _schedule_traces(
         data,
-        x_start=timeline_info["x_start"],
-        x_end=timeline_info["x_end"],
-        y=timeline_info["y"],
-        color=timeline_info["color"],
-        text=timeline_info["text"],
-        color_discrete_map=color_discrete_map,
+        timeline_info,
+        color_discrete_map,
+        edge_color_map,
+        taskname_info,
+        engine,
+        window,
+        index,
+        density_freq,
     )
 
-    px_fig.for_each_trace(
-        lambda tr: tr.update(
-            marker_line_color=edge_color_map.get(tr.name, "black"),
-            marker_line_width=1,
-            opacity=0.6,
-            textposition="inside",
-            insidetextanchor="middle",
-            textfont=taskname_info,
-        )
-    )
+    fig.add_traces(traces, rows=irow, cols=icol)
 
-    for tr in px_fig.data:
-        fig.add_trace(tr, row=irow, col=icol)
+    _style_schedule_axes(fig, ref_time, line_info, irow, icol)
 
+    if window is not None:
+        fig.update_xaxes(range=list(window), row=irow, col=icol)
+
+
+def _style_schedule_axes(
+    fig: go.Figure,
+    ref_time: dt.datetime,
+    line_info: dict,
+    irow: int | None,
+    icol: int | None,
+) -> None:
     fig.update_xaxes(
         type="date",
         showgrid=True,
@@ -281,6 +778,213 @@ def add_schedule(
     )
 
 
+_INCREMENTAL_META = "marimo_lib.schedule.incremental"
+
+
+class IncrementalSchedule:
+    """
+    前回描画したスケジュールとの差分だけを図に反映するレンダラー。
+
+    行は DataFrame の index で識別し、描画に使う列のハッシュで変更を判定する。
+    追加・削除・変更された行が属する色グループのトレースだけを作り直し、
+    残りのトレースには触らない。fig は Figure でも FigureWidget でもよい。
+
+    例:
+        fig = go.FigureWidget()
+        view = IncrementalSchedule(fig, timeline_info, color_discrete_map=fill_map)
+        view.update(df)           # 初回は全体を描画
+        add_task(df, task=...)    # 1 行追加
+        view.update(df)           # 追加された行の色グループだけ更新
+    """
+
+    def __init__(
+        self,
+        fig: go.Figure,
+        timeline_info: dict[str, str],
+        *,
+        color_discrete_map: dict[str, str] | None = None,
+        edge_color_map: dict[str, str] | None = None,
+        taskname_info: dict | None = None,
+        line_info: dict | None = None,
+        ref_time: dt.datetime | None = None,
+        irow: int | None = None,
+        icol: int | None = None,
+    ) -> None:
+        self.fig = fig
+        self.timeline_info = timeline_info
+        self.color_discrete_map = dict(color_discrete_map) if color_discrete_map is not None else {}
+        self.edge_color_map = dict(edge_color_map) if edge_color_map is not None else {}
+        self.taskname_info = taskname_info if taskname_info is not None else dict(size=14, color="white")
+        self.line_info = line_info if line_info is not None else dict(color="red", width=2, dash="dot")
+        self.ref_time = ref_time if ref_time is not None else dt.datetime.now()
+        self.irow = irow
+        self.icol = icol
+
+        self._hashes: pd.Series | None = None
+        self._groups: pd.Series | None = None
+        self._colors: dict[Any, str] = {}
+
+    def _columns(self) -> list[str]:
+        info = self.timeline_info
+        return list(dict.fromkeys([info["x_start"], info["x_end"], info["y"], info["color"], info["text"]]))
+
+    def _color(self, group: Any) -> str:
+        # px.timeline と同じ規則で、初めて見たグループに既定パレットの色を割り当てる
+        if group not in self._colors:
+            color = self.color_discrete_map.get(group)
+            if color is None:
+                n_default = len(self.color_discrete_map) + sum(
+                    g not in self.color_discrete_map for g in self._colors
+                )
+                from plotly.colors import qualitative
+
+                color = qualitative.Plotly[n_default % len(qualitative.Plotly)]
+            self._colors[group] = color
+        return self._colors[group]
+
+    def _group_trace(self, data: pd.DataFrame, group: Any) -> go.Bar:
+        (trace,) = _timeline_traces_bar(
+            data,
+            self.timeline_info,
+            {group: self._color(group)},
+            self.edge_color_map,
+            self.taskname_info,
+        )
+        trace.meta = _INCREMENTAL_META
+        return trace
+
+    def update(self, data: pd.DataFrame) -> dict[str, pd.Index]:
+        """
+        data を図に反映し、前回からの差分 (added, removed, changed の index) を返す。
+        """
+        color_col = self.timeline_info["color"]
+
+        hashes = pd.util.hash_pandas_object(data[self._columns()], index=False)
+        groups = data[color_col]
+
+        if self._hashes is None:
+            added = data.index
+            removed = data.index[:0]
+            changed = data.index[:0]
+        else:
+            added = hashes.index.difference(self._hashes.index, sort=False)
+            removed = self._hashes.index.difference(hashes.index, sort=False)
+            common = hashes.index.intersection(self._hashes.index, sort=False)
+            changed = common[hashes.loc[common].to_numpy() != self._hashes.loc[common].to_numpy()]
+
+        affected = pd.unique(np.concatenate([
+            groups.loc[added.append(changed)].to_numpy(dtype=object),
+            self._groups.loc[removed.append(changed)].to_numpy(dtype=object)
+            if self._groups is not None else np.empty(0, dtype=object),
+        ]))
+
+        gone = set()
+        updates = {}
+        new_traces = []
+
+        for group in affected:
+            rows = data[(groups == group).to_numpy()]
+            if len(rows) == 0:
+                gone.add(str(group))
+            else:
+                updates[str(group)] = self._group_trace(rows, group)
+
+        # 削除を先に済ませ、残ったトレースは位置ではなく名前で引く
+        # （batch_update 中に data を差し替えると、位置で予約した更新が別のトレースに当たる）
+        if gone:
+            self.fig.data = [
+                tr for tr in self.fig.data if not (tr.meta == _INCREMENTAL_META and tr.name in gone)
+            ]
+
+        current = {tr.name: tr for tr in self.fig.data if tr.meta == _INCREMENTAL_META}
+
+        with self.fig.batch_update():
+            for name, trace in updates.items():
+                target = current.get(name)
+                if target is None:
+                    new_traces.append(trace)
+                else:
+                    target.update(
+                        base=trace.base,
+                        x=trace.x,
+                        y=trace.y,
+                        text=trace.text,
+                        customdata=trace.customdata,
+                    )
+
+        if new_traces:
+            self.fig.add_traces(new_traces, rows=self.irow, cols=self.icol)
+
+        if self._hashes is None:
+            _style_schedule_axes(self.fig, self.ref_time, self.line_info, self.irow, self.icol)
+
+        self._hashes = hashes
+        self._groups = groups.copy()
+
+        return dict(added=added, removed=removed, changed=changed)
+
+
+def bind_schedule_window(
+    fig: go.FigureWidget,
+    data: pd.DataFrame,
+    timeline_info: dict[str, str],
+    *,
+    index: TimelineIndex | None = None,
+    color_discrete_map: dict[str, str] | None = None,
+    edge_color_map: dict[str, str] | None = None,
+    taskname_info: dict | None = None,
+    engine: Literal["bar", "px"] = "bar",
+    density_freq: str | None = "1D",
+    irow: int | None = None,
+    icol: int | None = None,
+) -> TimelineIndex:
+    """
+    FigureWidget の x 軸範囲が変わるたびに、その範囲のタスクだけを描き直す。
+
+    fig には add_schedule(window=...) で一度描画した FigureWidget を渡す。
+    差し替えるのは window 付きで描いたトレースだけで、他のトレースは残る。
+    監視するのは layout.xaxis.range（1 番目の x 軸）。
+    marimo では mo.ui.anywidget(fig) で表示すればズーム・パンに追従する。
+    マップに無い色グループの色はデータ全体から一度だけ決めるので、パンしても変わらない。
+    使った TimelineIndex を返す。
+    """
+    if index is None:
+        index = TimelineIndex(data, timeline_info["x_start"], timeline_info["x_end"])
+
+    color_discrete_map = _full_color_map(data, timeline_info["color"], color_discrete_map)
+
+    if edge_color_map is None:
+        edge_color_map = {}
+
+    if taskname_info is None:
+        taskname_info = dict(size=14, color="white")
+
+    def _on_range(layout, xrange):
+        if xrange is None or len(xrange) != 2:
+            return
+
+        traces = _schedule_traces(
+            data,
+            timeline_info,
+            color_discrete_map,
+            edge_color_map,
+            taskname_info,
+            engine,
+            tuple(xrange),
+            index,
+            density_freq,
+        )
+
+        with fig.batch_update():
+            fig.data = [tr for tr in fig.data if tr.meta != _WINDOW_META]
+            fig.add_traces(traces, rows=irow, cols=icol)
+
+    fig.layout.on_change(_on_range, "xaxis.range")
+
+    return index
+
+
+@profiled
 def load_schedule_file_as_str(input_path:str =  "filepath") -> str:
     """
     ファイルを読み込む関数
@@ -300,6 +1004,7 @@ def load_schedule_file_as_str(input_path:str =  "filepath") -> str:
     if os.path.isfile(input_path) is True:
         with open(input_path, "r", encoding="utf-8") as f:
             txt = f.read()
+        record_io(read=os.path.getsize(input_path))
 
         return txt
     
@@ -307,6 +1012,16 @@ def load_schedule_file_as_str(input_path:str =  "filepath") -> str:
         return ""
     
 
+async def load_schedule_file_as_str_async(input_path:str =  "filepath") -> str:
+    """
+    load_schedule_file_as_str の async 版。ファイル読み込みをスレッドプールで行う。
+
+    Async version of load_schedule_file_as_str. The file is read in a worker thread.
+    """
+    return await asyncio.to_thread(load_schedule_file_as_str, input_path)
+
+
+@profiled
 def parse_schedule_txt(txt:str | None = None) -> list[dict[any, any]]:
     if txt is not None:
         lines = txt.strip().splitlines()
@@ -327,6 +1042,7 @@ def parse_schedule_txt(txt:str | None = None) -> list[dict[any, any]]:
         return None
 
 
+@profiled
 def add_task_csv(
     data: pd.DataFrame | None = None,
     input_path: str | None = None,
@@ -360,4 +1076,43 @@ def add_task_csv(
 
         else:
             print(f"unknown func: {func_name}, row={row}")
-            continue
\ No newline at end of file
+            continue
+
+_SCHEDULE_COLUMNS = ["task", "start", "end", "resource", "name"]
+
+
+@profiled
+def load_schedule_parquet(
+    source: Any,
+    columns: list[str] | None = None,
+    filters: Any = None,
+) -> pd.DataFrame:
+    """
+    Parquet（ファイル・ディレクトリ）や pyarrow の Table からスケジュール表を読む（要 pyarrow）。
+
+    init_schedule と同じ列 (task, start, end, resource, name) に加えて columns の列だけを読み、
+    ほかの列は読まない。filters（pyarrow.compute.Expression または [("resource", "==", "Beam")]
+    形式のリスト）は行グループの統計で絞り込まれる。
+    start / end は日時型のまま返す（add_schedule はそのまま扱える）。
+
+    例:
+        df = load_schedule_parquet(
+            "notebook/data/schedule.parquet",
+            columns=["priority"],
+            filters=[("start", ">=", pd.Timestamp("2025-11-01"))],
+        )
+    """
+    from . import _arrow
+
+    available = _arrow.column_names(source)
+    wanted = [c for c in _SCHEDULE_COLUMNS if c in available]
+    wanted += [c for c in (columns or []) if c not in wanted]
+
+    table = _arrow.dataset(source).to_table(columns=wanted, filter=_arrow.expression(filters))
+    data = table.to_pandas()
+
+    for c in _SCHEDULE_COLUMNS:
+        if c not in data:
+            data[c] = pd.Series(dtype=object, index=data.index)
+
+    return data[_SCHEDULE_COLUMNS + [c for c in data.columns if c not in _SCHEDULE_COLUMNS]]
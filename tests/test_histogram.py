@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from marimo_lib.util import histogram
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    histogram.clear_histogram_cache()
+    yield
+    histogram.clear_histogram_cache()
+
+
+@pytest.fixture
+def xy():
+    rng = np.random.default_rng(0)
+    # 範囲 [0, 64) でビン境界が整数になるので、足し合わせた粗いビンと np.histogram2d がずれない
+    return [rng.uniform(0, 64, 20_000), rng.normal(32, 10, 20_000)]
+
+
+def assert_hist_equal(hist, expected):
+    for a, b in zip(hist, expected):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_cached_matches_numpy(xy):
+    expected = np.histogram2d(*xy, bins=[64, 32], range=[[0, 64], [0, 64]])
+
+    first = histogram.cached_histogram2d(xy, [64, 32], [0, 64], [0, 64])
+    second = histogram.cached_histogram2d(xy, [64, 32], [0, 64], [0, 64])
+
+    assert_hist_equal(first, expected)
+    assert_hist_equal(second, expected)
+    assert histogram.histogram_cache_info()["hits"] == 1
+
+
+def test_cached_without_range_matches_numpy(xy):
+    assert_hist_equal(histogram.cached_histogram2d(xy, [50, 40]), np.histogram2d(*xy, bins=[50, 40]))
+
+
+def test_in_place_change_is_not_served_from_cache(xy):
+    histogram.cached_histogram2d(xy, [64, 64], [0, 64], [0, 64])
+
+    # 同じ配列オブジェクトを書き換えても、古い結果を返さない
+    xy[0][::7] = 63.5
+    expected = np.histogram2d(*xy, bins=[64, 64], range=[[0, 64], [0, 64]])
+
+    assert_hist_equal(histogram.cached_histogram2d(xy, [64, 64], [0, 64], [0, 64]), expected)
+    assert histogram.histogram_cache_info()["hits"] == 0
+
+
+def test_returned_arrays_are_writable_copies(xy):
+    counts, xedges, _ = histogram.cached_histogram2d(xy, [64, 64], [0, 64], [0, 64])
+    counts[:] = -1
+    xedges[0] = 1e9
+
+    counts, xedges, _ = histogram.cached_histogram2d(xy, [64, 64], [0, 64], [0, 64])
+    assert counts.min() >= 0
+    assert xedges[0] == 0
+
+
+def test_coarser_bins_are_derived_from_finer(xy):
+    histogram.cached_histogram2d(xy, [64, 64], [0, 64], [0, 64])
+
+    for bins in ([16, 64], [32, 8], [4, 4]):
+        expected = np.histogram2d(*xy, bins=bins, range=[[0, 64], [0, 64]])
+        assert_hist_equal(histogram.cached_histogram2d(xy, bins, [0, 64], [0, 64]), expected)
+
+    info = histogram.histogram_cache_info()
+    assert (info["misses"], info["derived"]) == (1, 3)
+
+
+def test_weighted_grid_is_not_rebinned():
+    gx, gy = np.meshgrid(np.arange(4.0), np.arange(3.0), indexing="ij")
+    data = [gx.ravel(), gy.ravel(), np.arange(12.0)]
+
+    counts, xedges, yedges = histogram.cached_histogram2d(data)
+    np.testing.assert_array_equal(counts, np.arange(12.0).reshape(4, 3))
+    assert (len(xedges), len(yedges)) == (5, 4)
+
+
+@pytest.fixture
+def memmap_xy(tmp_path, xy):
+    path = tmp_path / "xy.npy"
+    np.save(path, np.column_stack(xy))
+    return histogram.load_columns(path)
+
+
+def in_memory(data, bins, xrange=None, yrange=None):
+    from marimo_lib.util.plot import get_np_histogram2d
+
+    return get_np_histogram2d([np.asarray(c) for c in data], bins, xrange, yrange)
+
+
+@pytest.mark.parametrize(
+    "bins, xrange, yrange",
+    [
+        ([40, 30], [0, 64], [0, 64]),
+        ([40, 30], None, None),
+        # 片方の範囲だけでは範囲を使わない（メモリ上の get_np_histogram2d と同じ）
+        ([40, 30], [10, 20], None),
+        ([np.linspace(0, 64, 5), np.linspace(-10, 70, 9)], None, None),
+        ([25, np.linspace(-10, 70, 9)], None, None),
+    ],
+)
+def test_chunked_matches_in_memory(memmap_xy, bins, xrange, yrange):
+    expected = in_memory(memmap_xy, bins, xrange, yrange)
+    hist = histogram.histogram2d_chunked(memmap_xy, bins, xrange, yrange, chunk_size=3_001)
+
+    np.testing.assert_array_equal(hist.counts, expected[0])
+    np.testing.assert_allclose(hist.xedges, expected[1])
+    np.testing.assert_allclose(hist.yedges, expected[2])
+
+
+@pytest.mark.parametrize("xrange", [None, [0, 64, 4], [5, 50, 7]])
+def test_go_histogram_memmap_uses_in_memory_bins(memmap_xy, xrange):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    from marimo_lib.util.plot import go_Histogram
+
+    fig = make_subplots(rows=1, cols=2)
+    mem_edges = go_Histogram(fig, 1, 1, [memmap_xy[0]], bins=[30], xrange=xrange)
+    edges = go_Histogram(fig, 1, 2, [np.asarray(memmap_xy[0])], bins=[30], xrange=xrange)
+
+    np.testing.assert_allclose(mem_edges, edges)
+    bar, hist = fig.data
+    assert isinstance(bar, go.Bar) and isinstance(hist, go.Histogram)
+    assert (hist.xbins.start, hist.xbins.end) == (edges[0], edges[-1])
+    assert hist.xbins.size == pytest.approx(edges[1] - edges[0])
+    np.testing.assert_array_equal(bar.y, np.histogram(memmap_xy[0], bins=edges)[0])
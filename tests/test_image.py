@@ -0,0 +1,114 @@
+import concurrent.futures
+import re
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from marimo_lib.util import image
+
+
+@pytest.fixture
+def image_paths(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"image{i}.png"
+        Image.fromarray(rng.integers(0, 255, (60, 80 + i, 3), dtype=np.uint8)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    image.clear_image_cache()
+    yield
+    image.clear_image_cache()
+
+
+def forbid_pool(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("ProcessPoolExecutor should not be started")
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", fail)
+
+
+def test_batch_matches_serial_and_reuses_cache(image_paths, tmp_path, monkeypatch):
+    specs = image_paths[:3] + [
+        {"input_path": p, "optimize": True, "cache_dir": str(tmp_path / "cache")} for p in image_paths[3:]
+    ]
+    first = image.get_image_html_batch(specs, width=40)
+
+    # 2 回目（marimo の再実行）は本プロセスのキャッシュだけで作る
+    forbid_pool(monkeypatch)
+    assert image.get_image_html_batch(specs, width=40) == first
+
+    image.clear_image_cache()
+    serial = [image.get_image_html(**image._image_spec_kwargs(spec), width=40) for spec in specs]
+    assert serial == first
+
+
+def test_small_batch_skips_pool(image_paths, monkeypatch):
+    forbid_pool(monkeypatch)
+    specs = image_paths[: image._BATCH_POOL_MIN - 1]
+    assert image.get_image_html_batch(specs) == [image.get_image_html(p) for p in specs]
+
+
+def test_batch_registers_assets_in_store(image_paths):
+    store = image.AssetStore()
+    htmls = image.get_image_html_batch([{"input_path": p, "store": store} for p in image_paths])
+
+    keys = {re.search(r'data-molib-asset="(\w+)"', h).group(1) for h in htmls}
+    assert len(keys) == len(image_paths)
+    assert all(key in store for key in keys)
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    # MIME 判定に必要な MP4 のシグネチャだけを持つファイル
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"\x00\x00\x00\x18ftypmp42" + bytes(64))
+    return path
+
+
+def test_file_src_rejects_converted_video_in_default_cache(video_path):
+    with pytest.raises(ValueError, match="file_src"):
+        image.get_video_html(video_path, mode="file_src", max_height=240)
+
+
+def test_generated_poster_is_inlined_for_file_src(video_path, tmp_path, monkeypatch):
+    poster = tmp_path / "cache" / "posters" / "frame.jpg"
+    poster.parent.mkdir(parents=True)
+    Image.new("RGB", (8, 8)).save(poster)
+    monkeypatch.setattr(image, "extract_poster_frame", lambda path, cache_dir=None: poster)
+
+    html = image.get_video_html(video_path, mode="file_src", poster=True)
+    assert 'poster="data:image/jpeg;base64,' in html
+    assert str(poster) not in html
+
+
+def test_ffmpeg_failure_raises_with_stderr(video_path, tmp_path, monkeypatch):
+    def fake_run(cmd, **kwargs):
+        return image.subprocess.CompletedProcess(cmd, 1, "", "Invalid data found when processing input")
+
+    monkeypatch.setattr(image, "_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(image.subprocess, "run", fake_run)
+
+    with pytest.raises(RuntimeError, match="Invalid data found"):
+        image.prepare_video(video_path, max_height=240, cache_dir=tmp_path / "cache")
+    assert not list((tmp_path / "cache").glob("*/*"))
+
+
+def test_plotly_iframe_loads_plotlyjs_from_store():
+    import plotly.graph_objects as go
+
+    fig_html = go.Figure(go.Scatter(x=[0, 1], y=[1, 0])).to_html(include_plotlyjs=True)
+    store = image.AssetStore()
+    iframe = image.get_plotly_iframe_html(fig_html, store=store)
+
+    assert len(store) == 1
+    key = next(iter(store._assets))
+    assert "plotly.js v" not in iframe
+    assert f"(&quot;{key}&quot;)" in iframe
+    # 親のローダーが無くても TypeError にならないように確かめてから呼ぶ
+    assert "typeof p.molibAssetURL === &quot;function&quot;" in iframe
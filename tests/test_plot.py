@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytest
+
+from marimo_lib.util import plot
+
+
+def test_import_does_not_set_renderer():
+    code = (
+        "import plotly.io as pio; before = pio.renderers.default; "
+        "import marimo_lib.util.plot; print(pio.renderers.default == before)"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    assert out.stdout.strip() == "True"
+
+
+def test_save_sets_browser_renderer(tmp_path, monkeypatch):
+    monkeypatch.setattr(plot, "_renderer_ready", False)
+    monkeypatch.setattr(pio.renderers, "default", "json")
+
+    plot.save_fig_as_html(go.Figure(), str(tmp_path / "figure.html"))
+    assert pio.renderers.default == "browser"
+
+
+def make_figure(n_traces=4, n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    fig = go.Figure(layout=dict(title="dashboard", xaxis=dict(range=[0, n])))
+    for i in range(n_traces):
+        fig.add_trace(go.Scatter(x=np.arange(n, dtype=float), y=rng.normal(size=n), name=f"trace{i}"))
+    fig.add_trace(go.Heatmap(z=rng.integers(0, 9, (6, 5)), name="grid"))
+    return fig
+
+
+def read_back(path):
+    data, layout = plot.get_plotly_values_json(plot.load_html_as_str(path))
+    return plot.decode_typed_arrays(data), layout
+
+
+def assert_traces_equal(data, fig):
+    assert len(data) == len(fig.data)
+    for got, trace in zip(data, fig.data):
+        for key, value in trace.to_plotly_json().items():
+            if isinstance(value, np.ndarray):
+                np.testing.assert_array_equal(np.asarray(got[key]), value)
+            else:
+                assert got[key] == value
+
+
+def test_incremental_writer_round_trip(tmp_path):
+    path = str(tmp_path / "dashboard.html")
+    fig = make_figure()
+    writer = plot.IncrementalHTMLWriter(path, stamp_title=False)
+
+    assert writer.save(fig) == {"path": path, "reused": 0, "encoded": 5}
+    data, layout = read_back(path)
+    assert_traces_equal(data, fig)
+    assert layout["title"] == {"text": "dashboard"}
+
+    # 1 本だけ変えると、その 1 本だけを JSON にし直す
+    fig.data[2].y = np.linspace(0, 1, 500)
+    assert writer.save(fig) == {"path": path, "reused": 4, "encoded": 1}
+    data, _ = read_back(path)
+    assert_traces_equal(data, fig)
+
+
+def test_incremental_writer_matches_to_html(tmp_path):
+    path = str(tmp_path / "dashboard.html")
+    fig = make_figure(seed=1)
+    plot.IncrementalHTMLWriter(path, stamp_title=False).save(fig)
+
+    expected = plot.get_plotly_values_json(pio.to_html(fig, full_html=True))
+    assert plot.get_plotly_values_json(plot.load_html_as_str(path)) == expected
+
+
+def test_incremental_writer_stamps_title_without_touching_fig(tmp_path):
+    path = str(tmp_path / "dashboard.html")
+    fig = make_figure()
+    plot.IncrementalHTMLWriter(path).save(fig)
+
+    _, layout = read_back(path)
+    assert layout["title"]["text"].startswith("dashboard (")
+    assert fig.layout.title.text == "dashboard"
+
+
+def parse_with_json5(script_js):
+    """raw_decode を通さない、以前の括弧走査 + json5 の読み方。"""
+    json5 = pytest.importorskip("json5")
+    pos = script_js.index("Plotly.newPlot(") + len("Plotly.newPlot(")
+    data_json, pos_after_data = plot.extract_bracketed(script_js, pos, "[", "]")
+    layout_json, _ = plot.extract_bracketed(script_js, pos_after_data, "{", "}")
+    return json5.loads(data_json), json5.loads(layout_json)
+
+
+@pytest.mark.parametrize(
+    "script_js",
+    [
+        # plotly 6 以降の to_html（typed array は base64）
+        pio.to_html(make_figure(n=50), include_plotlyjs=False, full_html=False),
+        # plotly 5 までの to_html（配列はリストのまま）
+        'window.PLOTLYENV=window.PLOTLYENV || {};'
+        'Plotly.newPlot("id", [{"type": "scatter", "x": [1, 2, 3], "y": [1.5, -2e-3, 4], "name": "a]b{c"}],'
+        ' {"title": {"text": "old \\"style\\""}}, {"responsive": true})',
+    ],
+)
+def test_parse_plotly_script_matches_json5(script_js):
+    assert plot.parse_plotly_script(script_js) == parse_with_json5(script_js)
+
+
+def test_parse_plotly_script_falls_back_to_json5():
+    pytest.importorskip("json5")
+    # 手で編集された、JSON としては不正な書き方
+    script_js = "Plotly.newPlot('id', [{x: [1, 2,], 'name': 'a',},], {title: {text: 't'},}, {})"
+
+    data, layout = plot.parse_plotly_script(script_js)
+    assert data == [{"x": [1, 2], "name": "a"}]
+    assert layout == {"title": {"text": "t"}}
+
+
+def test_bundle_round_trip(tmp_path):
+    path = str(tmp_path / "bundle.html")
+    figs = {f"fig{i}": make_figure(n_traces=i + 1, seed=i) for i in range(3)}
+    plot.save_figs_as_bundle(figs, path)
+
+    assert [entry["name"] for entry in plot.read_bundle_index(path)] == list(figs)
+    for i, (name, fig) in enumerate(figs.items()):
+        data, layout = plot.load_bundle_figure(path, name)
+        assert_traces_equal(plot.decode_typed_arrays(data), fig)
+        assert layout["title"] == {"text": "dashboard"}
+        assert plot.load_bundle_figure(path, i) == (data, layout)
+
+    # ブラウザ向けの普通の HTML としても最初の図が読める
+    data, _ = read_back(path)
+    assert_traces_equal(data, figs["fig0"])
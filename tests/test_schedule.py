@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from marimo_lib.util import schedule
+
+TIMELINE_INFO = dict(x_start="start", x_end="end", y="resource", color="resource", text="name")
+
+
+def make_schedule(rows):
+    """[(resource, start, end), ...] から init_schedule と同じ列の DataFrame を作る。"""
+    return pd.DataFrame(
+        [
+            {"task": f"Task{i}", "start": start, "end": end, "resource": resource, "name": f"Name{i}"}
+            for i, (resource, start, end) in enumerate(rows)
+        ]
+    )
+
+
+def bar_colors(fig):
+    return {tr.name: tr.marker.color for tr in fig.data if tr.name != "density"}
+
+
+@pytest.fixture
+def spread_schedule():
+    # 1 日ごとに resource が入れ替わるので、表示範囲によって初出順が変わる
+    rows = []
+    for day in range(10):
+        start = pd.Timestamp("2025-11-01") + pd.Timedelta(days=day)
+        rows.append((f"Resource{(day * 3) % 5}", start, start + pd.Timedelta(hours=5)))
+    return make_schedule(rows)
+
+
+def test_window_colors_match_full_render(spread_schedule):
+    full = go.Figure()
+    schedule.add_schedule(full, spread_schedule, TIMELINE_INFO, irow=None, icol=None)
+    expected = bar_colors(full)
+
+    for day in range(0, 10, 2):
+        lo = pd.Timestamp("2025-11-01") + pd.Timedelta(days=day)
+        fig = go.Figure()
+        schedule.add_schedule(
+            fig, spread_schedule, TIMELINE_INFO, irow=None, icol=None, window=(lo, lo + pd.Timedelta(days=2))
+        )
+        colors = bar_colors(fig)
+        assert colors
+        assert colors == {name: expected[name] for name in colors}
+
+
+def test_bound_window_keeps_colors_while_panning(spread_schedule):
+    fig = go.FigureWidget()
+    window = (pd.Timestamp("2025-11-01"), pd.Timestamp("2025-11-03"))
+    schedule.add_schedule(fig, spread_schedule, TIMELINE_INFO, irow=None, icol=None, window=window)
+    schedule.bind_schedule_window(fig, spread_schedule, TIMELINE_INFO)
+
+    seen = {}
+    for day in range(0, 10, 2):
+        lo = pd.Timestamp("2025-11-01") + pd.Timedelta(days=day)
+        fig.layout.xaxis.range = [lo, lo + pd.Timedelta(days=2)]
+        for name, color in bar_colors(fig).items():
+            assert seen.setdefault(name, color) == color
+
+    assert len(seen) == 5
+
+
+@pytest.fixture
+def random_schedule():
+    rng = np.random.default_rng(0)
+    n = 300
+    t0 = pd.Timestamp("2025-11-01")
+    start = t0 + pd.to_timedelta(rng.integers(0, 30 * 24 * 60, n), unit="min")
+    end = start + pd.to_timedelta(rng.integers(1, 3 * 24 * 60, n), unit="min")
+    resource = [f"Resource{i}" for i in rng.integers(0, 6, n)]
+    return make_schedule(list(zip(resource, start, end)))
+
+
+def brute_overlaps(data, lo, hi, resource=None):
+    start = pd.to_datetime(data["start"])
+    end = pd.to_datetime(data["end"])
+    mask = (start < pd.Timestamp(hi)) & (end > pd.Timestamp(lo))
+    if resource is not None:
+        mask &= data["resource"] == resource
+    return np.flatnonzero(mask.to_numpy())
+
+
+def test_timeline_index_query_matches_brute_force(random_schedule):
+    index = schedule.TimelineIndex(random_schedule)
+    for day in range(0, 32, 3):
+        lo = pd.Timestamp("2025-11-01") + pd.Timedelta(days=day)
+        hi = lo + pd.Timedelta(hours=30)
+        np.testing.assert_array_equal(index.query(lo, hi), brute_overlaps(random_schedule, lo, hi))
+
+
+def test_schedule_index_overlaps_matches_brute_force(random_schedule):
+    index = schedule.ScheduleIndex(random_schedule)
+    for resource in random_schedule["resource"].unique():
+        for day in range(0, 32, 4):
+            lo = pd.Timestamp("2025-11-01") + pd.Timedelta(days=day)
+            hi = lo + pd.Timedelta(days=2)
+            np.testing.assert_array_equal(
+                index.overlaps(lo, hi, resource=resource),
+                brute_overlaps(random_schedule, lo, hi, resource),
+            )
+
+
+def test_schedule_index_conflicts_matches_brute_force(random_schedule):
+    start = pd.to_datetime(random_schedule["start"]).to_numpy()
+    end = pd.to_datetime(random_schedule["end"]).to_numpy()
+    resource = random_schedule["resource"].to_numpy()
+
+    expected = set()
+    for a in range(len(random_schedule)):
+        for b in range(a + 1, len(random_schedule)):
+            if resource[a] == resource[b] and start[a] < end[b] and start[b] < end[a]:
+                expected.add(frozenset((a, b)))
+
+    conflicts = schedule.ScheduleIndex(random_schedule).conflicts()
+    pairs = [frozenset(p) for p in zip(conflicts["row_a"], conflicts["row_b"])]
+
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == expected
+    assert (conflicts["overlap_start"] < conflicts["overlap_end"]).all()
+
+
+def test_schedule_index_free_slots_matches_brute_force(random_schedule):
+    index = schedule.ScheduleIndex(random_schedule)
+    lo, hi = pd.Timestamp("2025-11-05"), pd.Timestamp("2025-11-12")
+    minutes = pd.date_range(lo, hi, freq="min", inclusive="left")
+
+    for resource in random_schedule["resource"].unique():
+        rows = random_schedule[random_schedule["resource"] == resource]
+        busy = np.zeros(len(minutes), dtype=bool)
+        for s, e in zip(pd.to_datetime(rows["start"]), pd.to_datetime(rows["end"])):
+            busy |= (minutes >= s) & (minutes < e)
+
+        free = np.zeros(len(minutes), dtype=bool)
+        for s, e in zip(*index.free_slots(resource, lo, hi).to_numpy().T):
+            free |= (minutes >= s) & (minutes < e)
+
+        np.testing.assert_array_equal(free, ~busy)
+
+
+def trace_rows(fig):
+    """IncrementalSchedule のトレースごとに、描画されている (y, text) の組を返す。"""
+    return {
+        tr.name: sorted(zip(tr.y, tr.text))
+        for tr in fig.data
+        if tr.meta == schedule._INCREMENTAL_META
+    }
+
+
+def expected_rows(data):
+    return {
+        str(resource): sorted(zip(group["resource"], group["name"]))
+        for resource, group in data.groupby("resource", sort=False)
+    }
+
+
+@pytest.mark.parametrize("figure_type", [go.Figure, go.FigureWidget])
+def test_incremental_update_remove_and_change(figure_type):
+    data = make_schedule([
+        ("Resource0", "2025-11-01 09:00", "2025-11-01 10:00"),
+        ("Resource1", "2025-11-01 09:00", "2025-11-01 11:00"),
+        ("Resource2", "2025-11-01 12:00", "2025-11-01 13:00"),
+        ("Resource3", "2025-11-01 14:00", "2025-11-01 15:00"),
+    ])
+    fig = figure_type()
+    view = schedule.IncrementalSchedule(fig, TIMELINE_INFO)
+    view.update(data)
+    assert trace_rows(fig) == expected_rows(data)
+
+    # 同じ update で Resource0 のグループを消し、Resource2 の行を変える
+    data = data.drop(index=0)
+    data.loc[2, "name"] = "Renamed"
+    data.loc[3, "resource"] = "Resource1"
+
+    diff = view.update(data)
+
+    assert list(diff["removed"]) == [0]
+    assert sorted(diff["changed"]) == [2, 3]
+    assert trace_rows(fig) == expected_rows(data)
+
+
+def test_incremental_update_matches_full_render():
+    rng = np.random.default_rng(1)
+    data = make_schedule([
+        (f"Resource{r}", pd.Timestamp("2025-11-01") + pd.Timedelta(hours=h), pd.Timestamp("2025-11-01") + pd.Timedelta(hours=h + 1))
+        for r, h in zip(rng.integers(0, 5, 40), rng.integers(0, 200, 40))
+    ])
+    fig = go.Figure()
+    view = schedule.IncrementalSchedule(fig, TIMELINE_INFO)
+    view.update(data)
+
+    for step in range(10):
+        rows = rng.choice(data.index, 3, replace=False)
+        data.loc[rows[0], "resource"] = f"Resource{rng.integers(0, 7)}"
+        data.loc[rows[1], "name"] = f"Step{step}"
+        data = data.drop(index=rows[2])
+        view.update(data)
+        assert trace_rows(fig) == expected_rows(data)